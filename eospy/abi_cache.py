@@ -0,0 +1,133 @@
+#
+# abi_cache.py
+#
+import json
+import os
+import threading
+import time
+from .types import Abi
+
+class AbiCacheEntry :
+    def __init__(self, account, abi, code_hash=None, abi_hash=None, checked=None) :
+        self.account = account
+        self.abi_json = abi
+        self.code_hash = code_hash
+        self.abi_hash = abi_hash
+        # time.monotonic() of the last hash check, None if it was never checked
+        self.checked = checked
+        self._abi = None
+
+    @property
+    def abi(self) :
+        ''' the Abi object is only built (and validated) once per entry '''
+        if self._abi is None :
+            self._abi = Abi(self.abi_json)
+        return self._abi
+
+    def matches(self, code_hash, abi_hash) :
+        if self.code_hash is None or self.abi_hash is None :
+            return False
+        return self.code_hash == code_hash and self.abi_hash == abi_hash
+
+    def to_dict(self) :
+        return {
+            'account_name': self.account,
+            'code_hash': self.code_hash,
+            'abi_hash': self.abi_hash,
+            'abi': self.abi_json,
+        }
+
+class AbiCache :
+    ''' Per-account ABI cache.
+
+        Entries are trusted for revalidate_interval seconds, after that the account's
+        code_hash/abi_hash are compared with the node and the entry is only refetched
+        when they changed. When directory is set entries are also written there as
+        <account>.json so a new process starts warm.
+    '''
+    def __init__(self, directory=None, revalidate_interval=300) :
+        self.directory = directory
+        self.revalidate_interval = revalidate_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.invalidations = 0
+        if directory and not os.path.isdir(directory) :
+            os.makedirs(directory)
+
+    def stats(self) :
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidations': self.revalidations,
+            'invalidations': self.invalidations,
+        }
+
+    def _path(self, account) :
+        return os.path.join(self.directory, '{}.json'.format(account))
+
+    def lookup(self, account) :
+        ''' return the entry for account from memory or disk, or None '''
+        with self._lock :
+            entry = self._entries.get(account)
+        if entry is None and self.directory :
+            entry = self._load(account)
+        return entry
+
+    def _load(self, account) :
+        try :
+            with open(self._path(account)) as rf :
+                data = json.load(rf)
+        except (IOError, OSError, ValueError) :
+            return None
+        # entries from disk are revalidated on first use
+        entry = AbiCacheEntry(account, data['abi'], data.get('code_hash'), data.get('abi_hash'))
+        with self._lock :
+            self._entries.setdefault(account, entry)
+            return self._entries[account]
+
+    def is_fresh(self, entry) :
+        if entry.checked is None :
+            return False
+        if self.revalidate_interval is None :
+            return True
+        return time.monotonic() - entry.checked <= self.revalidate_interval
+
+    def hit(self, entry, revalidated=False) :
+        with self._lock :
+            self.hits += 1
+            if revalidated :
+                self.revalidations += 1
+                entry.checked = time.monotonic()
+        return entry.abi
+
+    def put(self, account, abi, code_hash=None, abi_hash=None) :
+        entry = AbiCacheEntry(account, abi, code_hash, abi_hash, time.monotonic())
+        with self._lock :
+            self.misses += 1
+            self._entries[account] = entry
+        if self.directory :
+            tmp = self._path(account) + '.tmp'
+            with open(tmp, 'w') as wf :
+                json.dump(entry.to_dict(), wf)
+            os.replace(tmp, self._path(account))
+        return entry.abi
+
+    def invalidate(self, account=None) :
+        ''' drop account, or every account when None, from memory and disk '''
+        with self._lock :
+            accounts = [account] if account else list(self._entries)
+            for acct in accounts :
+                if self._entries.pop(acct, None) is not None :
+                    self.invalidations += 1
+        if self.directory :
+            if account is None :
+                accounts = [f[:-len('.json')] for f in os.listdir(self.directory) if f.endswith('.json')]
+            for acct in accounts :
+                try :
+                    os.remove(self._path(acct))
+                except OSError :
+                    pass
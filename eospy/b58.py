@@ -0,0 +1,49 @@
+#
+# b58.py
+#
+# base58 (bitcoin alphabet) used by keys and signatures
+#
+ALPHABET = b"123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+_ALPHABET_STR = ALPHABET.decode('ascii')
+# encoding divides by 58**2 and looks the two digits up at once
+_PAIRS = [_ALPHABET_STR[i // 58] + _ALPHABET_STR[i % 58] for i in range(58 * 58)]
+# decoding accumulates 10 digits in a small int before touching the bignum
+_CHUNK_DIGITS = 10
+_DECODE_TABLE = bytes.maketrans(ALPHABET + bytes(c for c in range(256) if c not in ALPHABET),
+                                bytes(range(58)) + b'\xff' * (256 - 58))
+
+def b58encode(data) :
+    ''' encode bytes-like data, returns str '''
+    data = bytes(data)
+    stripped = data.lstrip(b'\0')
+    pad = len(data) - len(stripped)
+    n = int.from_bytes(stripped, 'big')
+    pairs = _PAIRS
+    out = []
+    while n :
+        n, d = divmod(n, 3364)
+        out.append(pairs[d])
+    out.reverse()
+    # the top pair may carry a zero digit
+    return '1' * pad + ''.join(out).lstrip('1')
+
+def b58decode(s) :
+    ''' decode a base58 str or bytes, returns bytes '''
+    if isinstance(s, str) :
+        try :
+            s = s.encode('ascii')
+        except UnicodeEncodeError :
+            raise ValueError('invalid base58 string')
+    digits = bytes(s).translate(_DECODE_TABLE)
+    if b'\xff' in digits :
+        raise ValueError('invalid base58 string')
+    pad = len(s) - len(s.lstrip(b'1'))
+    n = 0
+    for i in range(0, len(digits), _CHUNK_DIGITS) :
+        v = 0
+        chunk = digits[i:i + _CHUNK_DIGITS]
+        for d in chunk :
+            v = v * 58 + d
+        n = n * 58 ** len(chunk) + v
+    return b'\0' * pad + n.to_bytes((n.bit_length() + 7) // 8, 'big')
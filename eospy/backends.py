@@ -0,0 +1,175 @@
+#
+# backends.py
+#
+# secp256k1 point math used by EOSKey. sign/verify/recover only need k*G, k*P and
+# ecdsa verification, every backend computes those exactly so signatures do not
+# depend on the backend in use.
+#
+import ecdsa
+from . import ecmult
+
+try :
+    import coincurve
+except ImportError :
+    coincurve = None
+
+class EcdsaBackend :
+    ''' pure python ecdsa, always available '''
+    name = 'ecdsa'
+
+    def generator_mul(self, k) :
+        ''' k*G as an affine (x, y) '''
+        R = k * ecdsa.SECP256k1.generator
+        return R.x(), R.y()
+
+    def mul(self, point, k) :
+        ''' k*point for an affine (x, y), None for infinity '''
+        R = k * ecdsa.ellipticcurve.Point(ecdsa.SECP256k1.curve, point[0], point[1], ecmult.N)
+        if R == ecdsa.ellipticcurve.INFINITY :
+            return None
+        return R.x(), R.y()
+
+    def verify(self, point, r, s, digest, table=None) :
+        ''' verify (r, s) over the 32 byte digest for the affine public point '''
+        # same steps as ecdsa.ecdsa.Public_key.verifies without building (and validating) a key object
+        order = ecmult.N
+        if not (0 < r < order and 0 < s < order) :
+            return False
+        G = ecdsa.SECP256k1.generator
+        Q = ecdsa.ellipticcurve.Point(ecdsa.SECP256k1.curve, point[0], point[1], order)
+        w = ecdsa.numbertheory.inverse_mod(s, order)
+        X = (int.from_bytes(digest, 'big') * w % order) * G + (r * w % order) * Q
+        return X != ecdsa.ellipticcurve.INFINITY and X.x() % order == r
+
+    def recover(self, r, s, i, digest) :
+        ''' public point (x, y) that produced (r, s) over the 32 byte digest with recovery id i, or None
+            http://www.secg.org/sec1-v2.pdf 4.1.6
+        '''
+        p, order = ecmult.P, ecmult.N
+        if not (0 < r < order and 0 < s < order) :
+            return None
+        x = r + (i // 2) * order
+        if x >= p :
+            return None
+        alpha = (x * x * x + 7) % p
+        # p = 3 mod 4
+        beta = pow(alpha, (p + 1) // 4, p)
+        if beta * beta % p != alpha :
+            return None
+        y = beta if beta % 2 == i % 2 else p - beta
+        e = int.from_bytes(digest, 'big')
+        rinv = pow(r, order - 2, order)
+        # Q = r^-1 * (s*R - e*G)
+        return ecmult.add(self.mul((x, y), s * rinv % order), self.generator_mul(-e * rinv % order))
+
+class PrecomputedBackend(EcdsaBackend) :
+    ''' jacobian arithmetic from ecmult with a fixed-base generator table '''
+    name = 'precomputed'
+
+    def __init__(self, window=6) :
+        self.table = ecmult.FixedBaseTable(ecmult.G, window)
+
+    def generator_mul(self, k) :
+        return self.table.mul(k)
+
+    def mul(self, point, k) :
+        return ecmult.mul(point, k)
+
+    def verify(self, point, r, s, digest, table=None) :
+        ''' table is an optional FixedBaseTable for point '''
+        order = ecmult.N
+        if not (0 < r < order and 0 < s < order) :
+            return False
+        w = pow(s, order - 2, order)
+        u1 = int.from_bytes(digest, 'big') * w % order
+        u2 = r * w % order
+        X = ecmult.add(self.table.mul(u1), table.mul(u2) if table else ecmult.mul(point, u2))
+        return X is not None and X[0] % order == r
+
+class CoincurveBackend(EcdsaBackend) :
+    ''' libsecp256k1 through coincurve '''
+    name = 'coincurve'
+
+    def __init__(self) :
+        if coincurve is None :
+            raise ValueError('coincurve is not installed')
+
+    @staticmethod
+    def _point(pub) :
+        data = pub.format(compressed=False)
+        return int.from_bytes(data[1:33], 'big'), int.from_bytes(data[33:], 'big')
+
+    def generator_mul(self, k) :
+        k %= ecmult.N
+        if not k :
+            return None
+        return self._point(coincurve.PublicKey.from_valid_secret(k.to_bytes(32, 'big')))
+
+    def mul(self, point, k) :
+        k %= ecmult.N
+        if not k :
+            return None
+        return self._point(coincurve.PublicKey.from_point(*point).multiply(k.to_bytes(32, 'big')))
+
+    def verify(self, point, r, s, digest, table=None) :
+        order = ecmult.N
+        if not (0 < r < order and 0 < s < order) :
+            return False
+        # libsecp256k1 only accepts low-S, (r, s) and (r, n - s) are the same signature
+        if s > order // 2 :
+            s = order - s
+        der = ecdsa.util.sigencode_der(r, s, order)
+        try :
+            return coincurve.PublicKey.from_point(*point).verify(der, digest, hasher=None)
+        except ValueError :
+            return False
+
+    def recover(self, r, s, i, digest) :
+        if not (0 < r < ecmult.N and 0 < s < ecmult.N) :
+            return None
+        try :
+            pub = coincurve.PublicKey.from_signature_and_message(r.to_bytes(32, 'big') + s.to_bytes(32, 'big') + bytes([i]),
+                                                                 digest, hasher=None)
+        except ValueError :
+            return None
+        return self._point(pub)
+
+#####
+# registry
+#####
+
+_registry = {}
+_backend = None
+
+def register_backend(name, factory) :
+    ''' make factory(**options) selectable with set_backend(name) '''
+    _registry[name] = factory
+
+def available_backends() :
+    return list(_registry)
+
+def set_backend(name, **options) :
+    ''' select the backend used by every EOSKey, returns the backend instance '''
+    global _backend
+    if name not in available_backends() :
+        raise ValueError('Unknown or unavailable backend {}, choose one of {}'.format(name, available_backends()))
+    _backend = _registry[name](**options)
+    return _backend
+
+def get_backend() :
+    return _backend
+
+def backend_spec() :
+    ''' (name, options) that recreate the current backend, e.g. in a worker process '''
+    if isinstance(_backend, PrecomputedBackend) :
+        return _backend.name, {'window': _backend.table.window}
+    return _backend.name, {}
+
+register_backend('ecdsa', EcdsaBackend)
+register_backend('precomputed', PrecomputedBackend)
+if coincurve is not None :
+    register_backend('coincurve', CoincurveBackend)
+
+# best available by default, the precomputed tables are opt-in because of their setup cost
+DEFAULT_BACKEND = 'coincurve' if coincurve is not None else 'ecdsa'
+set_backend(DEFAULT_BACKEND)
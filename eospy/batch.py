@@ -0,0 +1,70 @@
+#
+# batch.py
+#
+# signing across a process pool, the pure python curve math holds the GIL
+#
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .keys import EOSKey
+from .backends import set_backend, backend_spec
+
+# per worker state, filled once by _init_worker
+_worker_keys = []
+
+def _init_worker(wifs, backend, options) :
+    set_backend(backend, **options)
+    _worker_keys[:] = [EOSKey(wif) for wif in wifs]
+
+def _sign_chunk(jobs) :
+    keys = _worker_keys
+    return [keys[index].sign(digest) for index, digest in jobs]
+
+class BatchSigner :
+    ''' Sign many (digest, key) pairs on a ProcessPoolExecutor.
+
+        keys are WIF strings or EOSKey objects, workers load them (and build the
+        precomputed table when that backend is selected) once at startup. Jobs
+        name their key by position in keys, WIF or EOSKey and signatures come
+        back in job order, identical to EOSKey.sign.
+    '''
+    def __init__(self, keys, workers=None, chunksize=64, backend=None, **backend_options) :
+        self._wifs = [key.to_wif() if isinstance(key, EOSKey) else key for key in keys]
+        self._index = dict((wif, i) for i, wif in enumerate(self._wifs))
+        self.chunksize = chunksize
+        if backend is None :
+            backend, backend_options = backend_spec()
+        self._pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                                         initargs=(self._wifs, backend, backend_options))
+
+    def __enter__(self) :
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) :
+        self.close()
+
+    def close(self) :
+        self._pool.shutdown()
+
+    def _key_index(self, key) :
+        if isinstance(key, int) :
+            return key
+        if isinstance(key, EOSKey) :
+            key = key.to_wif()
+        try :
+            return self._index[key]
+        except KeyError :
+            raise KeyError('key was not loaded into the BatchSigner')
+
+    def sign(self, jobs) :
+        ''' jobs is an iterable of (digest, key), returns the list of signatures in order '''
+        jobs = [(self._key_index(key), digest) for digest, key in jobs]
+        size = self.chunksize
+        chunks = [jobs[i:i + size] for i in range(0, len(jobs), size)]
+        signatures = []
+        for chunk in self._pool.map(_sign_chunk, chunks) :
+            signatures.extend(chunk)
+        return signatures
+
+    def sign_digests(self, digests, key=0) :
+        ''' sign every digest with one key '''
+        return self.sign((digest, key) for digest in digests)
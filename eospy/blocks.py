@@ -0,0 +1,50 @@
+#
+# blocks.py
+#
+# fetching block ranges with many requests in flight while delivering in order
+#
+import asyncio
+import aiohttp
+from .exceptions import EOSAPIException
+
+# failures worth another attempt, errors from the node included since it may just be behind
+RETRY_ERRORS = (EOSAPIException, aiohttp.ClientError, asyncio.TimeoutError)
+
+async def retry(fetch, num, retries=3, retry_delay=0.5) :
+    ''' await fetch(num), retrying RETRY_ERRORS with exponential backoff '''
+    for attempt in range(retries + 1) :
+        try :
+            return await fetch(num)
+        except RETRY_ERRORS :
+            if attempt == retries :
+                raise
+        await asyncio.sleep(retry_delay * 2 ** attempt)
+
+async def fetch_ordered(fetch, start, end, concurrency=8, window=None, retries=3, retry_delay=0.5) :
+    ''' yield fetch(num) for num from start to end inclusive, in order
+
+        up to concurrency fetches run at once and no fetch starts more than window (default
+        4 * concurrency) numbers ahead of the next one to yield, which bounds the reorder buffer
+        of results that completed early
+    '''
+    window = max(window or 4 * concurrency, concurrency)
+    pending = {}
+    done = {}
+    scheduled = start
+    current = start
+    try :
+        while current <= end :
+            while scheduled <= end and len(pending) < concurrency and scheduled - current < window :
+                pending[asyncio.ensure_future(retry(fetch, scheduled, retries, retry_delay))] = scheduled
+                scheduled += 1
+            if current in done :
+                result = done.pop(current)
+                current += 1
+                yield result
+                continue
+            finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished :
+                done[pending.pop(task)] = task.result()
+    finally :
+        for task in pending :
+            task.cancel()
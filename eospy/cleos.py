@@ -3,11 +3,16 @@
 #
 
 from .dynamic_url import DynamicUrl
-from .keys import EOSKey, check_wif
+from .tapos import TaposCache
+from .abi_cache import AbiCache
+from .blocks import fetch_ordered
+from .tables import iter_rows, aiter_rows, scan_rows, split_key_range
+from .keys import EOSKey, check_wif, get_key, generate_keys
 from .signer import Signer
 from .utils import sig_digest, parse_key_file, sha256
 from .types import EOSEncoder, Transaction, PackedTransaction, Abi
-from .exceptions import (EOSKeyError, EOSMsigInvalidProposal, EOSSetSameAbi, EOSSetSameCode)
+from .exceptions import (EOSKeyError, EOSMsigInvalidProposal, EOSSetSameAbi, EOSSetSameCode,
+                         EOSSerializationError)
 import json
 import os
 import asyncio
@@ -15,11 +20,84 @@ from binascii import hexlify
 
 class Cleos :
     
-    def __init__(self, url='http://localhost:8888', version='v1') :
-        ''' '''
+    def __init__(self, url='http://localhost:8888', version='v1', session=None, pool_connections=10, pool_maxsize=10,
+                 pool_block=False, keep_alive=True, connector_limit=100, connector_limit_per_host=0,
+                 dns_cache_ttl=10, keepalive_timeout=15, tapos_refresh=60, local_serialization=True,
+                 abi_cache_dir=None, abi_revalidate=300, hedge=None) :
+        '''
+        url can be a list of API endpoints (or an eospy.endpoints.EndpointPool), requests then go to the
+        healthy endpoint with the lowest latency and fail over to the others on connection errors and 5xx
+
+        hedge (True or an eospy.endpoints.HedgePolicy) makes async reads that are slower than the recent
+        latency percentile send a duplicate request to a second endpoint and take the first answer
+
+        session can be a preconfigured requests.Session to share between Cleos objects, otherwise a pooled
+        session is created from pool_connections, pool_maxsize, pool_block and keep_alive and is closed by close()
+
+        the async methods share one aiohttp.ClientSession while Cleos is used as an async context manager
+        (or between async_open() and async_close()), its TCPConnector is tuned by connector_limit,
+        connector_limit_per_host, dns_cache_ttl and keepalive_timeout
+
+        push_transaction reuses the TAPOS reference block for tapos_refresh seconds, 0 fetches it on every push
+
+        json_to_bin serializes action data from a cached ABI when local_serialization is set and only falls back
+        to the abi_json_to_bin RPC for types the local serializer cannot handle
+
+        contract ABIs are cached per account and rechecked against the account's code_hash/abi_hash every
+        abi_revalidate seconds (None never rechecks), abi_cache_dir persists them between processes
+        '''
         self._prod_url = url
         self._version = version
-        self._dynurl = DynamicUrl(url=self._prod_url, version=self._version)
+        connector_kwargs = {
+            'limit': connector_limit,
+            'limit_per_host': connector_limit_per_host,
+            'ttl_dns_cache': dns_cache_ttl,
+            'keepalive_timeout': keepalive_timeout,
+        }
+        self._dynurl = DynamicUrl(url=self._prod_url, version=self._version, session=session,
+                                  connector_kwargs=connector_kwargs, hedge=hedge,
+                                  pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                  pool_block=pool_block, keep_alive=keep_alive)
+        self._tapos = TaposCache(tapos_refresh)
+        self._local_serialization = local_serialization
+        self.abi_cache = AbiCache(directory=abi_cache_dir, revalidate_interval=abi_revalidate)
+
+    def __enter__(self) :
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) :
+        self.close()
+
+    async def __aenter__(self) :
+        await self.async_open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) :
+        await self.async_close()
+
+    def close(self) :
+        ''' release the pooled http connections '''
+        self._tapos.stop()
+        self._dynurl.close()
+
+    async def async_open(self) :
+        ''' open the aiohttp session shared by all async methods '''
+        await self._dynurl.async_open()
+
+    async def async_close(self) :
+        ''' close the shared aiohttp session '''
+        self._tapos.stop()
+        await self._dynurl.async_close()
+
+    def endpoint_stats(self) :
+        ''' latency and error rate of every endpoint when Cleos was given several, otherwise None '''
+        pool = self._dynurl.pool
+        return pool.stats() if pool is not None else None
+
+    def hedge_stats(self) :
+        ''' hedged request counts and the current hedge delay, None when hedging is off '''
+        hedge = self._dynurl.hedge
+        return hedge.stats() if hedge is not None else None
     
     #####
     # private functions
@@ -77,6 +155,37 @@ class Cleos :
         chain_info = await self.async_get('chain.get_info', timeout=timeout)
         lib_info = await self.async_get_block(chain_info['last_irreversible_block_num'], timeout=timeout)
         return chain_info, lib_info
+
+    def get_tapos_info(self, timeout=30) :
+        ''' cached version of get_chain_lib_info used to reference transactions '''
+        tapos = self._tapos.get()
+        if tapos is None :
+            tapos = self.get_chain_lib_info(timeout=timeout)
+            self._tapos.set(*tapos)
+        return tapos
+
+    async def async_get_tapos_info(self, timeout=30) :
+        ''' cached version of async_get_chain_lib_info used to reference transactions '''
+        tapos = self._tapos.get()
+        if tapos is None :
+            tapos = await self.async_get_chain_lib_info(timeout=timeout)
+            self._tapos.set(*tapos)
+        return tapos
+
+    def start_tapos_refresher(self) :
+        ''' keep the TAPOS reference fresh from a background thread '''
+        if not self._tapos.refresh_interval :
+            raise ValueError('tapos_refresh must be set to use the refresher')
+        self._tapos.start(self.get_chain_lib_info)
+
+    async def async_start_tapos_refresher(self) :
+        ''' keep the TAPOS reference fresh from a task on the running loop '''
+        if not self._tapos.refresh_interval :
+            raise ValueError('tapos_refresh must be set to use the refresher')
+        self._tapos.async_start(self.async_get_chain_lib_info, asyncio.get_running_loop())
+
+    def stop_tapos_refresher(self) :
+        self._tapos.stop()
         
     def get_block(self, block_num, timeout=30) :
         ''' '''
@@ -86,6 +195,18 @@ class Cleos :
         ''' '''
         res = await self.async_post('chain.get_block', params=None, json={'block_num_or_id' : block_num}, timeout=timeout)
         return res
+
+    async def fetch_blocks(self, start, end, concurrency=8, window=None, retries=3, retry_delay=0.5, timeout=30) :
+        '''
+        async generator of the blocks start..end (inclusive) in block order
+        concurrency requests are kept in flight over the async session (spread over the endpoints when several
+        are configured), failed requests are retried retries times with exponential backoff and no request
+        starts more than window blocks ahead of the next block to yield
+        '''
+        async def fetch(block_num) :
+            return await self.async_get_block(block_num, timeout=timeout)
+        async for block in fetch_ordered(fetch, start, end, concurrency, window, retries, retry_delay) :
+            yield block
         
     def get_account(self, acct_name, timeout=30) :
         ''' '''
@@ -112,9 +233,19 @@ class Cleos :
         ''' '''
         return await self.async_post('chain.get_abi', params=None, json={'account_name' : acct_name}, timeout=timeout)
 
-    def get_raw_abi(self, acct_name, timeout=30) :
-        ''' '''
-        return self.post('chain.get_raw_abi', params=None, json={'account_name' : acct_name}, timeout=timeout)
+    def get_raw_abi(self, acct_name, abi_hash=None, timeout=30) :
+        ''' the node leaves out the abi when abi_hash is still current '''
+        json = {'account_name' : acct_name}
+        if abi_hash :
+            json['abi_hash'] = abi_hash
+        return self.post('chain.get_raw_abi', params=None, json=json, timeout=timeout)
+
+    async def async_get_raw_abi(self, acct_name, abi_hash=None, timeout=30) :
+        ''' the node leaves out the abi when abi_hash is still current '''
+        json = {'account_name' : acct_name}
+        if abi_hash :
+            json['abi_hash'] = abi_hash
+        return await self.async_post('chain.get_raw_abi', params=None, json=json, timeout=timeout)
         
     def get_actions(self, acct_name, pos=-1, offset=-20, timeout=30) :
         '''
@@ -192,6 +323,63 @@ class Cleos :
         res = await self.async_post('chain.get_table_rows', params=None, json=json, timeout=timeout)
         return res
 
+    def iter_table(self, code, scope, table, index_position='', key_type='', lower_bound='', upper_bound='', page_size=100,
+                   prefetch=1, timeout=30) :
+        '''
+        every row between lower_bound and upper_bound in index order, paging with next_key
+        up to prefetch pages (of page_size rows) are fetched ahead while the rows are consumed, 0 disables it
+        '''
+        def fetch(bound) :
+            return self.get_table(code, scope, table, index_position=index_position, key_type=key_type,
+                                  lower_bound=bound, upper_bound=upper_bound, limit=page_size, timeout=timeout)
+        return iter_rows(fetch, lower_bound, prefetch)
+
+    def aiter_table(self, code, scope, table, index_position='', key_type='', lower_bound='', upper_bound='', page_size=100,
+                    prefetch=1, timeout=30) :
+        ''' async iter_table, use with async for '''
+        async def fetch(bound) :
+            return await self.async_get_table(code, scope, table, index_position=index_position, key_type=key_type,
+                                              lower_bound=bound, upper_bound=upper_bound, limit=page_size, timeout=timeout)
+        return aiter_rows(fetch, lower_bound, prefetch)
+
+    def get_table_by_scope(self, code, table='', lower_bound='', upper_bound='', limit=10, timeout=30) :
+        '''
+        POST /v1/chain/get_table_by_scope
+        {"code":"eosio.token","table":"accounts","lower_bound":"","upper_bound":"","limit":10}
+        '''
+        json = {"code": code, "table": table, "lower_bound": lower_bound, "upper_bound": upper_bound, "limit": limit}
+        return self.post('chain.get_table_by_scope', params=None, json=json, timeout=timeout)
+
+    async def async_get_table_by_scope(self, code, table='', lower_bound='', upper_bound='', limit=10, timeout=30) :
+        json = {"code": code, "table": table, "lower_bound": lower_bound, "upper_bound": upper_bound, "limit": limit}
+        res = await self.async_post('chain.get_table_by_scope', params=None, json=json, timeout=timeout)
+        return res
+
+    async def scan_table(self, code, table, scopes=None, shards=1, concurrency=8, ordered=True, lower_bound='',
+                         upper_bound='', page_size=100, prefetch=1, timeout=30) :
+        '''
+        async generator of (scope, row) for every row of table in scopes (every scope of the table when None)
+
+        with shards > 1 the primary key range of each scope is split into that many numeric ranges,
+        concurrency ranges are fetched at the same time over the async session.
+        ordered yields scope by scope in key order, otherwise rows come in the order the pages arrive
+        '''
+        if scopes is None :
+            async def fetch_scopes(bound) :
+                return await self.async_get_table_by_scope(code, table, lower_bound=bound, limit=1000, timeout=timeout)
+            scopes = [row['scope'] async for row in aiter_rows(fetch_scopes)]
+        elif isinstance(scopes, str) :
+            scopes = [scopes]
+        key_type = 'i64' if shards > 1 else ''
+        bounds = split_key_range(shards, lower_bound, upper_bound) if shards > 1 else [(lower_bound, upper_bound)]
+        ranges = ((scope, lower, upper) for scope in scopes for lower, upper in bounds)
+
+        async def fetch(scope, bound, upper) :
+            return await self.async_get_table(code, scope, table, key_type=key_type, lower_bound=bound,
+                                              upper_bound=upper, limit=page_size, timeout=timeout)
+        async for scope, row in scan_rows(fetch, ranges, concurrency, ordered, prefetch) :
+            yield scope, row
+
     def get_producers(self, lower_bound='', limit=50, timeout=30) :
         '''
         POST /v1/chain/get_producers HTTP/1.0
@@ -227,12 +415,15 @@ class Cleos :
                 }],
             }
             # Converting payload to binary
-            data = self.abi_json_to_bin(payload['account'], payload['name'], arguments)
+            data = self.json_to_bin(payload['account'], payload['name'], arguments, timeout=timeout)
             # Inserting payload binary form as "data" field in original payload
             payload['data'] = data['binargs']
             trx = {"actions": [payload]}
-            sign_key = EOSKey(key)
-            return self.push_transaction(trx, sign_key, broadcast=broadcast)
+            sign_key = key if isinstance(key, EOSKey) else get_key(key)
+            resp = self.push_transaction(trx, sign_key, broadcast=broadcast)
+            if broadcast :
+                self.abi_cache.invalidate(account)
+            return resp
 
 
     def set_code(self, account, permission, code_file, key, broadcast=True, timeout=30):
@@ -262,12 +453,15 @@ class Cleos :
                 }],
             }
             # Converting payload to binary
-            data = self.abi_json_to_bin(payload['account'], payload['name'], arguments)
+            data = self.json_to_bin(payload['account'], payload['name'], arguments, timeout=timeout)
             # Inserting payload binary form as "data" field in original payload
             payload['data'] = data['binargs']
             trx = {"actions": [payload]}
-            sign_key = EOSKey(key)
-            return self.push_transaction(trx, sign_key, broadcast=broadcast)
+            sign_key = key if isinstance(key, EOSKey) else get_key(key)
+            resp = self.push_transaction(trx, sign_key, broadcast=broadcast)
+            if broadcast :
+                self.abi_cache.invalidate(account)
+            return resp
         
 
     #####
@@ -275,7 +469,7 @@ class Cleos :
     #####
     def push_transaction(self, transaction, keys, broadcast=True, compression='none', timeout=30):
         ''' parameter keys can be a list of WIF strings or EOSKey objects or a filename to key file'''
-        chain_info,lib_info = self.get_chain_lib_info()
+        chain_info,lib_info = self.get_tapos_info(timeout=timeout)
         trx = Transaction(transaction, chain_info, lib_info)
         #encoded = trx.encode()
         digest = sig_digest(trx.encode(), chain_info['chain_id'])
@@ -319,7 +513,7 @@ class Cleos :
 
     async def async_push_transaction(self, transaction, keys, broadcast=True, compression='none', timeout=30) :
         ''' parameter keys can be a list of WIF strings or EOSKey objects or a filename to key file'''
-        chain_info,lib_info = await self.async_get_chain_lib_info()
+        chain_info,lib_info = await self.async_get_tapos_info(timeout=timeout)
         if "packed_trx" in transaction:
             digest = sig_digest(bytearray.fromhex(transaction['packed_trx']), chain_info['chain_id'])
         else:
@@ -328,16 +522,16 @@ class Cleos :
             digest = sig_digest(trx.encode(), chain_info['chain_id'])
         # sign the transaction
         signatures = []
-        if os.path.isfile(keys):
+        if isinstance(keys, str) and os.path.isfile(keys):
              keys = parse_key_file(keys, first_key=False)
         elif not isinstance(keys, list) :
             keys = [keys]
 
         for key in keys :
-            if check_wif(key) :
-                k = EOSKey(key)
-            elif isinstance(key, EOSKey) :
+            if isinstance(key, EOSKey) :
                 k = key
+            elif check_wif(key) :
+                k = get_key(key)
             else :
                 raise EOSKeyError('Must pass a WIF string or EOSKey')
             signatures.append(k.sign(digest))
@@ -388,6 +582,60 @@ class Cleos :
         res = await self.async_post('chain.abi_json_to_bin', params=None, json=json, timeout=timeout)
         return res
         
+    def get_cached_abi(self, acct_name, timeout=30) :
+        ''' return the Abi object for acct_name from the abi cache '''
+        entry = self.abi_cache.lookup(acct_name)
+        if entry is not None and self.abi_cache.is_fresh(entry) :
+            return self.abi_cache.hit(entry)
+        hashes = self.get_raw_abi(acct_name, entry and entry.abi_hash, timeout=timeout)
+        if entry is not None and entry.matches(hashes['code_hash'], hashes['abi_hash']) :
+            return self.abi_cache.hit(entry, revalidated=True)
+        abi = self.get_abi(acct_name, timeout=timeout)['abi']
+        return self.abi_cache.put(acct_name, abi, hashes['code_hash'], hashes['abi_hash'])
+
+    async def async_get_cached_abi(self, acct_name, timeout=30) :
+        ''' return the Abi object for acct_name from the abi cache '''
+        entry = self.abi_cache.lookup(acct_name)
+        if entry is not None and self.abi_cache.is_fresh(entry) :
+            return self.abi_cache.hit(entry)
+        hashes = await self.async_get_raw_abi(acct_name, entry and entry.abi_hash, timeout=timeout)
+        if entry is not None and entry.matches(hashes['code_hash'], hashes['abi_hash']) :
+            return self.abi_cache.hit(entry, revalidated=True)
+        abi = await self.async_get_abi(acct_name, timeout=timeout)
+        return self.abi_cache.put(acct_name, abi['abi'], hashes['code_hash'], hashes['abi_hash'])
+
+    def _local_json_to_bin(self, abi, action, args) :
+        struct_name = abi.get_action(action).type
+        return {'binargs': abi.json_to_bin(struct_name, args)}
+
+    def json_to_bin(self, code, action, args, local=None, timeout=30) :
+        '''
+        same result as abi_json_to_bin, but serialized from the cached contract ABI without asking the node
+        local=True never uses the RPC, local=False always does and None follows the local_serialization setting
+        falling back to the RPC for types that cannot be serialized locally
+        '''
+        if local is False or (local is None and not self._local_serialization) :
+            return self.abi_json_to_bin(code, action, args, timeout=timeout)
+        abi = self.get_cached_abi(code, timeout=timeout)
+        try :
+            return self._local_json_to_bin(abi, action, args)
+        except EOSSerializationError :
+            if local :
+                raise
+        return self.abi_json_to_bin(code, action, args, timeout=timeout)
+
+    async def async_json_to_bin(self, code, action, args, local=None, timeout=30) :
+        ''' async version of json_to_bin '''
+        if local is False or (local is None and not self._local_serialization) :
+            return await self.async_abi_json_to_bin(code, action, args, timeout=timeout)
+        abi = await self.async_get_cached_abi(code, timeout=timeout)
+        try :
+            return self._local_json_to_bin(abi, action, args)
+        except EOSSerializationError :
+            if local :
+                raise
+        return await self.async_abi_json_to_bin(code, action, args, timeout=timeout)
+
     #####
     # create keys
     #####
@@ -396,6 +644,10 @@ class Cleos :
         ''' '''
         k = EOSKey()
         return k
+
+    def create_keys(self, count, workers=None, chunksize=1000) :
+        ''' generator of count (WIF, public key) pairs, see eospy.keys.generate_keys '''
+        return generate_keys(count, workers=workers, chunksize=chunksize)
         
     #####
     # multisig
@@ -471,7 +723,7 @@ class Cleos :
                 'active' : active_auth
         })
         
-        newaccount_data = self.abi_json_to_bin('eosio', 'newaccount',{'creator' : creator, 'name' : acct_name, 'owner': owner_auth, 'active':active_auth})
+        newaccount_data = self.json_to_bin('eosio', 'newaccount',{'creator' : creator, 'name' : acct_name, 'owner': owner_auth, 'active':active_auth}, timeout=timeout)
         print(newaccount_data)
         newaccount_json = {
             'account' : 'eosio',
@@ -484,7 +736,7 @@ class Cleos :
             'data' : newaccount_data['binargs']
         }
         # create buyrambytes trx
-        buyram_data = self.abi_json_to_bin('eosio', 'buyrambytes', {'payer':creator, 'receiver':acct_name, 'bytes': ramkb*1024})
+        buyram_data = self.json_to_bin('eosio', 'buyrambytes', {'payer':creator, 'receiver':acct_name, 'bytes': ramkb*1024}, timeout=timeout)
         buyram_json = {
             'account' : 'eosio',
             'name' : 'buyrambytes',
@@ -496,8 +748,8 @@ class Cleos :
             'data' : buyram_data['binargs']
         }
         # create delegatebw
-        delegate_data = self.abi_json_to_bin('eosio', 'delegatebw', 
-            {'from': creator, 'receiver': acct_name, 'stake_net_quantity':stake_net, 'stake_cpu_quantity': stake_cpu, 'transfer': transfer })
+        delegate_data = self.json_to_bin('eosio', 'delegatebw', 
+            {'from': creator, 'receiver': acct_name, 'stake_net_quantity':stake_net, 'stake_cpu_quantity': stake_cpu, 'transfer': transfer }, timeout=timeout)
         delegate_json = {
             'account' : 'eosio',
             'name' : 'delegatebw',
@@ -549,7 +801,7 @@ class Cleos :
                 "waits": []
             }
         
-        newaccount_data = await self.async_abi_json_to_bin('eosio', 'newaccount',{'creator' : creator, 'name' : acct_name, 'owner': owner_auth, 'active':active_auth})
+        newaccount_data = await self.async_json_to_bin('eosio', 'newaccount',{'creator' : creator, 'name' : acct_name, 'owner': owner_auth, 'active':active_auth}, timeout=timeout)
         newaccount_json = {
             'account' : 'eosio',
             'name' : 'newaccount',
@@ -561,7 +813,7 @@ class Cleos :
             'data' : newaccount_data['binargs']
         }
         # create buyrambytes trx
-        buyram_data = await self.async_abi_json_to_bin('eosio', 'buyrambytes', {'payer':creator, 'receiver':acct_name, 'bytes': ramkb*1024})
+        buyram_data = await self.async_json_to_bin('eosio', 'buyrambytes', {'payer':creator, 'receiver':acct_name, 'bytes': ramkb*1024}, timeout=timeout)
         buyram_json = {
             'account' : 'eosio',
             'name' : 'buyrambytes',
@@ -573,8 +825,8 @@ class Cleos :
             'data' : buyram_data['binargs']
         }
         # create delegatebw
-        delegate_data = await self.async_abi_json_to_bin('eosio', 'delegatebw', 
-            {'from': creator, 'receiver': acct_name, 'stake_net_quantity':stake_net, 'stake_cpu_quantity': stake_cpu, 'transfer': transfer })
+        delegate_data = await self.async_json_to_bin('eosio', 'delegatebw', 
+            {'from': creator, 'receiver': acct_name, 'stake_net_quantity':stake_net, 'stake_cpu_quantity': stake_cpu, 'transfer': transfer }, timeout=timeout)
         delegate_json = {
             'account' : 'eosio',
             'name' : 'delegatebw',
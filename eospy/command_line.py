@@ -4,6 +4,7 @@ from .testeos import TestEos
 from .utils import parse_key_file
 from .exceptions import InvalidPermissionFormat, EOSSetSameAbi, EOSSetSameCode
 import json
+import os
 
 def console_print(data):
     print(json.dumps(data, indent=4))
@@ -22,6 +23,20 @@ def set_code(ce, account, permission, code, key, broadcast, timeout):
     except EOSSetSameCode:
         print('Skipping set code because the new code is the same as the existing code')
 
+def write_keys(ce, count, output, workers, chunk_size):
+    lines = []
+    written = 0
+    with open(output, 'w') as wf:
+        for wif, pub in ce.create_keys(count, workers=workers, chunksize=chunk_size):
+            lines.append(json.dumps({'private_key': wif, 'public_key': pub}) + '\n')
+            if len(lines) >= chunk_size:
+                wf.writelines(lines)
+                written += len(lines)
+                lines = []
+        wf.writelines(lines)
+        written += len(lines)
+    print('Wrote {} keys to {}'.format(written, output))
+
 def cleos():
     parser = argparse.ArgumentParser(description='Command Line Interface to EOSIO via python')
     parser.add_argument('--api-version','-v', type=str, default='v1', action='store', dest='api_version')
@@ -94,6 +109,12 @@ def cleos():
     group_key = create_key.add_mutually_exclusive_group(required=True)
     group_key.add_argument('--key-file','-k', type=str, action='store', help='file to output the keys too', dest='key_file')
     group_key.add_argument('--to-console','-c', action='store_true', help='output to the console', dest='to_console')
+    # create many EOS keys
+    create_keys = create_subparsers.add_parser('keys')
+    create_keys.add_argument('--count','-n', type=int, action='store', required=True, help='number of key pairs to create', dest='count')
+    create_keys.add_argument('--output','-o', type=str, action='store', required=True, help='JSON lines file to write the keys to', dest='output')
+    create_keys.add_argument('--workers','-w', type=int, action='store', default=None, help='number of worker processes, default is the cpu count', dest='workers')
+    create_keys.add_argument('--chunk-size', type=int, action='store', default=1000, help='keys generated and written per chunk', dest='chunk_size')
     # push
     push_parser = subparsers.add_parser('push')
     push_subparsers = push_parser.add_subparsers(dest='push')
@@ -221,7 +242,7 @@ def cleos():
                         "permission": permission,
                     }],
                 }
-            data = ce.abi_json_to_bin(args.account, args.action, arguments)
+            data = ce.json_to_bin(args.account, args.action, arguments, timeout=args.timeout)
             print(data)
             payload['data'] = data['binargs']
             print(payload)
@@ -246,6 +267,8 @@ def cleos():
                     wf.write(priv_key + '\n')
                     wf.write(pub_key + '\n')
                 print("Wrote keys to {}".format(args.key_file))
+        elif args.create == 'keys':
+            write_keys(ce, args.count, args.output, args.workers or os.cpu_count(), args.chunk_size)
     # SET
     elif args.subparser == 'set':
         if args.set == 'abi':
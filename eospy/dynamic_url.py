@@ -2,17 +2,87 @@
 # python library cleos
 #
 import requests
+from requests.adapters import HTTPAdapter
 import asyncio
 import aiohttp
 import json
+import time
 from .exceptions import EOSAPIException
+from .endpoints import EndpointPool, HedgePolicy
+
+# errors that mean the node could not be reached, a read goes to the next endpoint
+CONNECTION_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+ASYNC_CONNECTION_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+# a write may already have been accepted after a read timeout or a 5xx, resending it would come back
+# as a duplicate transaction, so writes only fail over when the connection was never made
+CONNECT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.ConnectTimeout)
+ASYNC_CONNECT_ERRORS = (aiohttp.ClientConnectorError,)
+# api calls that change chain state, these are never hedged or resent after reaching a node
+WRITE_PREFIXES = ('push_', 'send_')
+
+def create_session(pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True, max_retries=0) :
+    ''' Create a requests.Session with a pooled HTTPAdapter
+
+        pool_connections is the number of per-host pools to keep, pool_maxsize
+        is the number of connections kept alive per host and pool_block makes
+        callers wait for a free connection instead of opening an extra one.
+    '''
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          pool_block=pool_block, max_retries=max_retries)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if not keep_alive :
+        session.headers['Connection'] = 'close'
+    return session
+
+def node_unavailable(status, body) :
+    ''' a 5xx from the node or a proxy in front of it, nodeos also answers failed chain calls
+        (unknown block, assertion failures, ...) with a 500 but those carry an error object
+        and would fail the same way on every node
+    '''
+    return status >= 500 and not (isinstance(body, dict) and 'error' in body)
+
+def is_write(path) :
+    ''' True for api calls in WRITE_PREFIXES, path is the part of the url after the base url '''
+    return path.split('?')[0].rsplit('/', 1)[-1].startswith(WRITE_PREFIXES)
+
+def _response_body(r) :
+    try :
+        return r.json()
+    except ValueError :
+        return r.text
 
 class DynamicUrl :
     #def __init__(self, url='http://localhost:8888', version='v1', cache=None) :
-    def __init__(self, url='http://localhost:8888', version='v1', cache=None) :
+    def __init__(self, url='http://localhost:8888', version='v1', cache=None, session=None, root=None,
+                 connector_kwargs=None, hedge=None, **session_kwargs) :
+        ''' url is one API endpoint, or a list of them (or an EndpointPool) to spread requests over
+
+            hedge is a HedgePolicy (True for the defaults) that duplicates slow async reads to a second
+            endpoint, it needs several endpoints
+        '''
+        pool = None
+        if isinstance(url, (list, tuple)) :
+            pool = EndpointPool(url)
+        elif isinstance(url, EndpointPool) :
+            pool = url
+        if pool is not None :
+            # urls are built against the first endpoint and rebased onto the one picked by the pool
+            url = pool.endpoints[0].url
         self._cache = cache or []
         self._baseurl = url
         self._version = version
+        # every derived DynamicUrl shares the connection pools of the root
+        self._root = root or self
+        if self._root is self :
+            self._owns_session = session is None
+            self._session = session or create_session(**session_kwargs)
+            # aiohttp sessions are bound to a loop so they are only created by async_open
+            self._async_session = None
+            self._connector_kwargs = connector_kwargs or {}
+            self._pool = pool
+            self._hedge = HedgePolicy() if hedge is True else hedge
 
     def __getattr__(self, name) :
         return self._(name)
@@ -20,61 +90,216 @@ class DynamicUrl :
     def __del__(self) :
         pass
 
+    def __enter__(self) :
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) :
+        self.close()
+
     def _(self, name) :
-        return DynamicUrl(url=self._baseurl, version=self._version, cache=self._cache+[name])
+        return DynamicUrl(url=self._baseurl, version=self._version, cache=self._cache+[name], root=self._root)
+
+    @property
+    def session(self) :
+        return self._root._session
+
+    @property
+    def pool(self) :
+        ''' the EndpointPool when several endpoints were given, otherwise None '''
+        return self._root._pool
+
+    @property
+    def hedge(self) :
+        return self._root._hedge
+
+    def _path(self, url) :
+        ''' the part of url after the base url, None for urls that do not point at the endpoint '''
+        if self.pool is None or not url.startswith(self._baseurl) :
+            return None
+        return url[len(self._baseurl):]
+
+    def close(self) :
+        ''' close the pooled connections if the session was created here '''
+        root = self._root
+        if root._owns_session :
+            root._session.close()
 
     def method(self) :
         return self._cache
-    
+
     def create_url(self):
         url_str = '{0}/{1}'.format(self._baseurl,self._version)
         for obj in self.method() :
             url_str = '{0}/{1}'.format(url_str, obj)
         return url_str
 
+    def request(self, method, url, **kwargs) :
+        ''' send the request, with several endpoints it goes to the fastest healthy one and fails over
+            to the next on connection errors and 5xx responses, writes only when the connection failed
+        '''
+        path = self._path(url)
+        if path is None :
+            return self.session.request(method, url, **kwargs)
+        pool = self.pool
+        write = is_write(path)
+        errors = CONNECT_ERRORS if write else CONNECTION_ERRORS
+        error = None
+        for endpoint in pool.ordered() :
+            start = time.monotonic()
+            pool.begin(endpoint)
+            try :
+                r = self.session.request(method, endpoint.url + path, **kwargs)
+            except errors as exc :
+                pool.record_failure(endpoint)
+                error = exc
+                continue
+            finally :
+                pool.end(endpoint)
+            # only 5xx bodies are parsed here, get_url/post_url parse the rest once
+            if r.status_code >= 500 and node_unavailable(r.status_code, _response_body(r)) :
+                pool.record_failure(endpoint)
+                if write :
+                    return r
+                error = r
+                continue
+            pool.record_success(endpoint, time.monotonic() - start)
+            return r
+        if isinstance(error, Exception) :
+            raise error
+        # every node answered with a 5xx, let the caller report the last one
+        return error
+
     def get_url(self, url, params=None, json=None, timeout=30) :
         # get request
-        r = requests.get(url,params=params, json=json, timeout=timeout)
+        r = self.request('GET', url, params=params, json=json, timeout=timeout)
         r.raise_for_status()
         return r.json()
 
     def post_url(self, url, params=None, json=None, data=None, timeout=30) :
         # post request
-        r = requests.post(url,params=params, json=json, data=data, timeout=timeout)
+        r = self.request('POST', url, params=params, json=json, data=data, timeout=timeout)
         try :
             r.raise_for_status()
         except :
             raise requests.exceptions.HTTPError('Error: {}'.format(r.json()))
         return r.json()
 
-    async def async_get_url(self, url, params = None, json = None, timeout = 30):
-        result = None
+    async def async_open(self) :
+        ''' create the shared aiohttp session, must be called from the running event loop '''
+        root = self._root
+        if root._async_session is None or root._async_session.closed :
+            connector = aiohttp.TCPConnector(**root._connector_kwargs)
+            root._async_session = aiohttp.ClientSession(connector=connector)
+        return root._async_session
+
+    async def async_close(self) :
+        ''' close the shared aiohttp session and its connection pool '''
+        root = self._root
+        if root._async_session is not None :
+            await root._async_session.close()
+            root._async_session = None
+
+    async def _async_request(self, session, method, url, ok_status, **kwargs) :
+        path = self._path(url)
+        if path is not None :
+            if self._hedged(path) :
+                return await self._async_hedged(session, method, path, ok_status, **kwargs)
+            return await self._async_failover(session, method, path, ok_status, **kwargs)
+        async with session.request(method, url, **kwargs) as res:
+            if res.status in ok_status:
+                return await res.json()
+            err = await res.json()
+            raise EOSAPIException(err)
+
+    async def _async_send(self, session, method, url, **kwargs) :
+        ''' (status, body) with body decoded from json when possible '''
+        async with session.request(method, url, **kwargs) as res :
+            text = await res.text()
+            try :
+                return res.status, json.loads(text)
+            except ValueError :
+                return res.status, text
+
+    async def _async_failover(self, session, method, path, ok_status, endpoints=None, **kwargs) :
+        pool = self.pool
+        hedge = self.hedge
+        write = is_write(path)
+        errors = ASYNC_CONNECT_ERRORS if write else ASYNC_CONNECTION_ERRORS
+        error = None
+        for endpoint in endpoints or pool.ordered() :
+            start = time.monotonic()
+            pool.begin(endpoint)
+            try :
+                status, body = await self._async_send(session, method, endpoint.url + path, **kwargs)
+            except errors as exc :
+                pool.record_failure(endpoint)
+                error = exc
+                continue
+            except asyncio.CancelledError :
+                # lost a hedge race, the node took at least this long
+                pool.record_latency(endpoint, time.monotonic() - start)
+                raise
+            finally :
+                pool.end(endpoint)
+            if node_unavailable(status, body) :
+                pool.record_failure(endpoint)
+                if write :
+                    raise EOSAPIException(body)
+                error = EOSAPIException(body)
+                continue
+            elapsed = time.monotonic() - start
+            pool.record_success(endpoint, elapsed)
+            if hedge is not None :
+                hedge.observe(elapsed)
+            if status in ok_status :
+                return body
+            raise EOSAPIException(body)
+        raise error
+
+    def _hedged(self, path) :
+        hedge = self.hedge
+        if hedge is None or len(self.pool.endpoints) < 2 :
+            return False
+        return not is_write(path)
+
+    async def _async_hedged(self, session, method, path, ok_status, **kwargs) :
+        ''' start on the best endpoint, if it is still busy after the hedge delay send the same read to
+            the next one, the first to finish wins and the other is cancelled
+        '''
+        hedge = self.hedge
+        hedge.start()
+        endpoints = self.pool.ordered()
+        # each leg fails over on its own, starting from a different endpoint
+        first = asyncio.ensure_future(self._async_failover(session, method, path, ok_status, endpoints, **kwargs))
+        legs = {first}
+        try :
+            done, _ = await asyncio.wait(legs, timeout=hedge.delay())
+            if not done and hedge.allow() :
+                legs.add(asyncio.ensure_future(self._async_failover(session, method, path, ok_status,
+                                                                    endpoints[1:] + endpoints[:1], **kwargs)))
+            if not done :
+                done, _ = await asyncio.wait(legs, return_when=asyncio.FIRST_COMPLETED)
+            winner = first if first in done else done.pop()
+            return winner.result()
+        finally :
+            pending = [leg for leg in legs if not leg.done()]
+            for leg in pending :
+                leg.cancel()
+            # let the losers record their latency and release their connections before returning,
+            # an error from a leg that finished together with the winner is not reported
+            await asyncio.gather(*legs, return_exceptions=True)
+
+    async def async_request(self, method, url, ok_status=(200,), **kwargs) :
+        ''' send the request over the shared session, or over a one-off session if async_open was not called '''
+        session = self._root._async_session
+        if session is not None and not session.closed :
+            return await self._async_request(session, method, url, ok_status, **kwargs)
         async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(url, params = params, json = json, timeout = timeout) as res:
-                    if res.status == 200:
-                        result = await res.json()
-                    else:
-                        err = await res.json()
-                        raise EOSAPIException(err)
-            except Exception as e:
-                raise e
-        return result
+            return await self._async_request(session, method, url, ok_status, **kwargs)
+
+    async def async_get_url(self, url, params = None, json = None, timeout = 30):
+        return await self.async_request('GET', url, params = params, json = json, timeout = timeout)
 
     async def async_post_url(self, url, params = None, json = None, data = None, timeout = 30):
-        result = None
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(url, params = params, json = json, data = data, timeout = timeout) as res:
-                    if res.status == 200 or res.status == 202:
-                        result = await res.json()
-                    else:
-                        err = await res.json()
-                        raise EOSAPIException(err)
-            except Exception as e:
-                raise e
-        return result
-            
-
-
-    
+        return await self.async_request('POST', url, ok_status = (200, 202), params = params, json = json,
+                                        data = data, timeout = timeout)
@@ -0,0 +1,137 @@
+#
+# ecmult.py
+#
+# secp256k1 point multiplication in jacobian coordinates with precomputed tables.
+# points are passed around as affine (x, y) int tuples, None is the point at infinity.
+#
+
+P = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
+N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+GX = 0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798
+GY = 0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8
+G = (GX, GY)
+
+# jacobian infinity has Z == 0
+_INFINITY = (1, 1, 0)
+
+def _double(X, Y, Z) :
+    # a == 0 for secp256k1
+    if not Y or not Z :
+        return _INFINITY
+    YY = Y * Y % P
+    S = 4 * X * YY % P
+    M = 3 * X * X % P
+    X3 = (M * M - 2 * S) % P
+    return X3, (M * (S - X3) - 8 * YY * YY) % P, 2 * Y * Z % P
+
+def _add_affine(X1, Y1, Z1, x2, y2) :
+    ''' jacobian + affine '''
+    if not Z1 :
+        return x2, y2, 1
+    Z1Z1 = Z1 * Z1 % P
+    H = (x2 * Z1Z1 - X1) % P
+    r = (y2 * Z1 * Z1Z1 - Y1) % P
+    if not H :
+        if not r :
+            return _double(X1, Y1, Z1)
+        return _INFINITY
+    HH = H * H % P
+    HHH = H * HH % P
+    V = X1 * HH % P
+    X3 = (r * r - HHH - 2 * V) % P
+    return X3, (r * (V - X3) - Y1 * HHH) % P, Z1 * H % P
+
+def _add(X1, Y1, Z1, X2, Y2, Z2) :
+    ''' jacobian + jacobian '''
+    if not Z1 :
+        return X2, Y2, Z2
+    if not Z2 :
+        return X1, Y1, Z1
+    Z1Z1 = Z1 * Z1 % P
+    Z2Z2 = Z2 * Z2 % P
+    U1 = X1 * Z2Z2 % P
+    S1 = Y1 * Z2 * Z2Z2 % P
+    H = (X2 * Z1Z1 - U1) % P
+    r = (Y2 * Z1 * Z1Z1 - S1) % P
+    if not H :
+        if not r :
+            return _double(X1, Y1, Z1)
+        return _INFINITY
+    HH = H * H % P
+    HHH = H * HH % P
+    V = U1 * HH % P
+    X3 = (r * r - HHH - 2 * V) % P
+    return X3, (r * (V - X3) - S1 * HHH) % P, Z1 * Z2 * H % P
+
+def _to_affine(X, Y, Z) :
+    if not Z :
+        return None
+    zinv = pow(Z, P - 2, P)
+    zinv2 = zinv * zinv % P
+    return X * zinv2 % P, Y * zinv2 * zinv % P
+
+def add(p1, p2) :
+    ''' add two affine points '''
+    if p1 is None :
+        return p2
+    if p2 is None :
+        return p1
+    return _to_affine(*_add_affine(p1[0], p1[1], 1, p2[0], p2[1]))
+
+def mul(point, k) :
+    ''' k * point for an arbitrary point, 4 bit fixed window '''
+    k %= N
+    if not k or point is None :
+        return None
+    x, y = point
+    # 1..15 * point
+    multiples = [None, (x, y, 1)]
+    for _ in range(14) :
+        multiples.append(_add_affine(*multiples[-1], x, y))
+    acc = _INFINITY
+    for shift in range((k.bit_length() + 3) // 4 * 4 - 4, -1, -4) :
+        acc = _double(*_double(*_double(*_double(*acc))))
+        d = (k >> shift) & 0xf
+        if d :
+            acc = _add(*acc, *multiples[d])
+    return _to_affine(*acc)
+
+class FixedBaseTable :
+    ''' Comb table for multiplying one fixed point.
+
+        Row j holds d * 2**(window*j) * point for every window digit d, so k * point is
+        one mixed addition per window of k and no doublings. A window of 4 is 64 rows
+        of 15 points; larger windows trade memory and setup time for fewer additions.
+    '''
+    def __init__(self, point=G, window=4) :
+        self.point = point
+        self.window = window
+        self._mask = (1 << window) - 1
+        self._rows = []
+        base = (point[0], point[1], 1)
+        for _ in range((256 + window - 1) // window) :
+            row = [None]
+            acc = base
+            bx, by = _to_affine(*base)
+            for _ in range(self._mask) :
+                row.append(_to_affine(*acc))
+                acc = _add_affine(*acc, bx, by)
+            self._rows.append(row)
+            # acc is now 2**window * base
+            base = acc
+
+    def mul(self, k) :
+        ''' k * point as an affine (x, y), None for infinity '''
+        k %= N
+        acc = _INFINITY
+        window = self.window
+        mask = self._mask
+        for row in self._rows :
+            if not k :
+                break
+            d = k & mask
+            if d :
+                x, y = row[d]
+                acc = _add_affine(*acc, x, y)
+            k >>= window
+        return _to_affine(*acc)
@@ -0,0 +1,156 @@
+#
+# endpoints.py
+#
+import threading
+import time
+from collections import deque
+
+class Endpoint :
+    ''' health of one API node, latency and error_rate are exponentially weighted moving averages '''
+    def __init__(self, url) :
+        self.url = url.rstrip('/')
+        self.latency = None
+        self.error_rate = 0.0
+        self.failures = 0
+        self.down_until = 0
+        self.requests = 0
+        # requests currently waiting on this node
+        self.inflight = 0
+
+    def healthy(self, now=None) :
+        return self.down_until <= (time.monotonic() if now is None else now)
+
+    def score(self) :
+        ''' expected seconds per successful request given the requests already waiting on the node,
+            unmeasured idle nodes score 0 so they get probed unless they already failed
+        '''
+        if self.latency is None :
+            return float('inf') if self.error_rate or self.inflight else 0.0
+        return self.latency * (1 + self.inflight) / max(1.0 - self.error_rate, 0.05)
+
+    def stats(self) :
+        return {'url': self.url, 'latency': self.latency, 'error_rate': self.error_rate,
+                'failures': self.failures, 'healthy': self.healthy(), 'requests': self.requests,
+                'inflight': self.inflight}
+
+class EndpointPool :
+    ''' Route requests over several API nodes.
+
+        ordered() puts the healthy nodes first, fastest score first, then the
+        nodes that are cooling down so a request still has somewhere to go when
+        every node failed recently. max_failures consecutive failures take a node
+        out of rotation for cooldown seconds, alpha is the EWMA smoothing factor.
+    '''
+    def __init__(self, urls, alpha=0.3, max_failures=3, cooldown=10) :
+        if isinstance(urls, str) :
+            urls = [urls]
+        if not urls :
+            raise ValueError('EndpointPool needs at least one url')
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.alpha = alpha
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+
+    @property
+    def urls(self) :
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def ordered(self) :
+        now = time.monotonic()
+        with self._lock :
+            healthy = [e for e in self.endpoints if e.healthy(now)]
+            down = [e for e in self.endpoints if not e.healthy(now)]
+            healthy.sort(key=Endpoint.score)
+            down.sort(key=lambda e : e.down_until)
+        return healthy + down
+
+    def best(self) :
+        return self.ordered()[0]
+
+    def begin(self, endpoint) :
+        ''' a request was sent to endpoint, concurrent requests spread over the nodes by load '''
+        with self._lock :
+            endpoint.inflight += 1
+
+    def end(self, endpoint) :
+        with self._lock :
+            endpoint.inflight -= 1
+
+    def record_latency(self, endpoint, elapsed) :
+        ''' fold elapsed into the latency only, e.g. a lower bound from a cancelled request '''
+        alpha = self.alpha
+        with self._lock :
+            endpoint.latency = elapsed if endpoint.latency is None else alpha * elapsed + (1 - alpha) * endpoint.latency
+
+    def record_success(self, endpoint, elapsed) :
+        self.record_latency(endpoint, elapsed)
+        alpha = self.alpha
+        with self._lock :
+            endpoint.requests += 1
+            endpoint.error_rate *= 1 - alpha
+            endpoint.failures = 0
+            endpoint.down_until = 0
+
+    def record_failure(self, endpoint) :
+        alpha = self.alpha
+        with self._lock :
+            endpoint.requests += 1
+            endpoint.error_rate = alpha + (1 - alpha) * endpoint.error_rate
+            endpoint.failures += 1
+            if endpoint.failures >= self.max_failures :
+                endpoint.down_until = time.monotonic() + self.cooldown
+
+    def stats(self) :
+        with self._lock :
+            return [endpoint.stats() for endpoint in self.endpoints]
+
+class HedgePolicy :
+    ''' When to send a duplicate read to a second endpoint.
+
+        A read that has not answered after the percentile latency of recent reads
+        (initial_delay until min_samples are in) is sent again to the next endpoint
+        and the first answer wins. budget caps hedges to that fraction of the reads
+        seen so far, so a slow cluster is never hit with twice the traffic.
+    '''
+    def __init__(self, percentile=95, budget=0.05, initial_delay=0.05, min_delay=0.005, window=256, min_samples=20) :
+        if not 0 < percentile <= 100 :
+            raise ValueError('percentile must be in (0, 100]')
+        self.percentile = percentile
+        self.budget = budget
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.requests = 0
+        self.hedges = 0
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, elapsed) :
+        with self._lock :
+            self._samples.append(elapsed)
+
+    def delay(self) :
+        ''' seconds to wait for the first endpoint before hedging '''
+        with self._lock :
+            if len(self._samples) < self.min_samples :
+                return self.initial_delay
+            samples = sorted(self._samples)
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return max(samples[index], self.min_delay)
+
+    def start(self) :
+        ''' count a hedgeable request '''
+        with self._lock :
+            self.requests += 1
+
+    def allow(self) :
+        ''' take a hedge out of the budget, False when it is spent '''
+        with self._lock :
+            if self.hedges + 1 > self.budget * self.requests :
+                return False
+            self.hedges += 1
+            return True
+
+    def stats(self) :
+        return {'requests': self.requests, 'hedges': self.hedges, 'delay': self.delay()}
@@ -15,19 +15,23 @@ class EOSMsigInvalidProposal(Exception):
     ''' Raised when an invalid proposal is queried'''
     pass
 
-class EOSBufferInvalidType(Exception):
+class EOSSerializationError(Exception):
+    ''' Raised when a value cannot be serialized '''
+    pass
+
+class EOSBufferInvalidType(EOSSerializationError):
     ''' Raised when trying to encode/decode an invalid type '''
     pass
 
-class EOSInvalidSchema(Exception):
+class EOSInvalidSchema(EOSSerializationError):
     ''' Raised when trying to process a schema '''
     pass
 
-class EOSUnknownObj(Exception):
+class EOSUnknownObj(EOSSerializationError):
     ''' Raised when an object is not found in the ABI '''
     pass
 
-class EOSAbiProcessingError(Exception):
+class EOSAbiProcessingError(EOSSerializationError):
     ''' Raised when the abi action cannot be processed '''
     pass
 
@@ -43,4 +47,8 @@ class EOSAPIException(Exception):
     def __init__(self, data):
             self.data = data
     def __str__(self):
-        return repr(self.data)
\ No newline at end of file
+        return repr(self.data)
+
+class EOSTablePaginationError(Exception):
+    ''' Raised when the node does not say where the next table page starts '''
+    pass
@@ -1,34 +1,197 @@
-import base58
 import os
 import ecdsa
 import re
 from binascii import hexlify, unhexlify
-from .utils import sha256, ripemd160, str_to_hex, hex_to_int
+from .utils import sha256, ripemd160, str_to_hex, hex_to_int, stringToSignature, stringToPublicKey, publicKeyToString
+from .b58 import b58encode, b58decode
 from .signer import Signer
+from . import ecmult
+from .backends import (set_backend, get_backend, register_backend, available_backends, backend_spec, PrecomputedBackend,
+                       DEFAULT_BACKEND)
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from collections import deque
+from itertools import islice
 import hashlib
 import time
 import struct
 import array
 
 def check_wif(key) :
-    if isinstance(key, str) :
-        try :
-            EOSKey(key)
-            return True
-        except Exception as ex:
-            pass
-    return False
+    ''' format-only check of a WIF or PVT_ private key string: base58, checksum, version byte
+        and secret range. no key is derived.
+    '''
+    if not isinstance(key, str) :
+        return False
+    try :
+        match = re.search('^PVT_([A-Za-z0-9]+)_([A-Za-z0-9]+)$', key)
+        if match :
+            key_type, key_string = match.groups()
+            data = b58decode(key_string)
+            secret = data[:-4]
+            h = hashlib.new('rmd160')
+            h.update(secret + key_type.encode('utf-8'))
+            checksum = h.digest()[:4]
+        else :
+            data = b58decode(key)
+            # 0x80 version byte, secret, double sha256 checksum
+            if data[:1] != b'\x80' :
+                return False
+            secret = data[1:-4]
+            checksum = hashlib.sha256(hashlib.sha256(data[:-4]).digest()).digest()[:4]
+    except ValueError :
+        return False
+    if len(secret) != 32 or data[-4:] != checksum :
+        return False
+    return 0 < int.from_bytes(secret, 'big') < ecmult.N
+
+#####
+# opt-in precomputed tables
+#####
+
+def precompute_generator(window=6) :
+    ''' switch to the precomputed backend so k*G in sign/verify/recover is a table walk
+        instead of double-and-add. costs well under a second and a few MB once, output is unchanged.
+    '''
+    backend = get_backend()
+    if not isinstance(backend, PrecomputedBackend) or backend.table.window != window :
+        backend = set_backend('precomputed', window=window)
+    return backend.table
+
+def clear_precomputed() :
+    ''' drop the generator table and go back to the default backend '''
+    set_backend(DEFAULT_BACKEND)
+
+#####
+# signature recovery
+#####
+
+def _recover_compressed(sig, digest) :
+    key_type, data = stringToSignature(sig)
+    if key_type != 0 :
+        raise TypeError('Unsupported curve for signature {}'.format(sig))
+    # first byte is 27 + 4 (compressed) + recovery id
+    Q = get_backend().recover(int.from_bytes(data[1:33], 'big'), int.from_bytes(data[33:65], 'big'),
+                              (data[0] - 27) & 3, unhexlify(digest))
+    if Q is None :
+        return None
+    return bytes([2 + (Q[1] & 1)]) + Q[0].to_bytes(32, 'big')
+
+def recover_public_key(sig, digest) :
+    ''' return the EOS public key that produced the SIG_K1_ signature over the hex digest, None if
+        the signature cannot be recovered
+    '''
+    compressed = _recover_compressed(sig, digest)
+    if compressed is None :
+        return None
+    return publicKeyToString((0, compressed))
+
+def _verify_one(sig, digest, pubkey) :
+    # the recovered point is the only key (r, s) verifies against for this R, so comparing
+    # keys is the full ecdsa check at the cost of one recovery
+    try :
+        compressed = _recover_compressed(sig, digest)
+    except Exception :
+        return False
+    return compressed is not None and compressed == stringToPublicKey(pubkey)[1]
+
+def _verify_chunk(items) :
+    return [_verify_one(*item) for item in items]
+
+def verify_many(items, workers=None, chunksize=256) :
+    ''' check a list of (signature, digest, public key), returns a list of bools in order.
+        with workers the list is split over a process pool running the current backend.
+    '''
+    items = list(items)
+    if not workers :
+        return _verify_chunk(items)
+    chunks = [items[i:i + chunksize] for i in range(0, len(items), chunksize)]
+    backend, options = backend_spec()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker_backend, initargs=(backend, options)) as pool :
+        for chunk in pool.map(_verify_chunk, chunks) :
+            results.extend(chunk)
+    return results
+
+def _init_worker_backend(backend, options) :
+    set_backend(backend, **options)
+
+#####
+# bulk key generation
+#####
+
+def _generate_chunk(count) :
+    keys = [EOSKey() for _ in range(count)]
+    return [(k.to_wif(), k.to_public()) for k in keys]
+
+def generate_keys(n, workers=None, chunksize=1000) :
+    ''' yield n new (WIF, public key) pairs. with workers they are minted on a process pool in
+        chunks of chunksize, at most two chunks per worker are in flight so memory stays flat
+        however many keys are requested.
+    '''
+    sizes = iter([min(chunksize, n - i) for i in range(0, n, chunksize)])
+    if not workers :
+        for size in sizes :
+            for pair in _generate_chunk(size) :
+                yield pair
+        return
+    backend, options = backend_spec()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker_backend, initargs=(backend, options)) as pool :
+        pending = deque(pool.submit(_generate_chunk, size) for size in islice(sizes, workers * 2))
+        while pending :
+            chunk = pending.popleft().result()
+            for size in islice(sizes, 1) :
+                pending.append(pool.submit(_generate_chunk, size))
+            for pair in chunk :
+                yield pair
 
 class EOSKey(Signer) :
+    # a key is the secret and its public point, everything else is derived lazily and cached
+    __slots__ = ('_secret', '_point', '_table', '_signing_key', '_verifying_key', '_compressed', '_public', '_wif')
+
     def __init__(self, private_str='') :
         ''' '''
+        self._table = None
+        self._signing_key = None
+        self._verifying_key = None
+        self._compressed = None
+        self._public = None
+        self._wif = None
         if private_str :
             private_key, format, key_type = self._parse_key(private_str)
-            self._sk = ecdsa.SigningKey.from_string(unhexlify(private_key), curve=ecdsa.SECP256k1)
+            if len(private_key) != 64 :
+                raise ValueError('Expected a 32 byte private key, got {} bytes'.format(len(private_key) // 2))
+            self._secret = int(private_key, 16)
+            if not 0 < self._secret < ecmult.N :
+                raise ValueError('Private key is out of range')
         else :
             prng = self._create_entropy()
-            self._sk = ecdsa.SigningKey.generate(curve=ecdsa.SECP256k1, entropy=prng)
-        self._vk = self._sk.get_verifying_key()
+            # same draw as ecdsa.SigningKey.generate
+            self._secret = ecdsa.util.randrange(ecmult.N, prng)
+        self._point = get_backend().generator_mul(self._secret)
+
+    @property
+    def _sk(self) :
+        ''' ecdsa.SigningKey, only built for callers that need the ecdsa object '''
+        if self._signing_key is None :
+            self._signing_key = ecdsa.SigningKey.from_secret_exponent(self._secret, curve=ecdsa.SECP256k1)
+        return self._signing_key
+
+    @property
+    def _vk(self) :
+        ''' ecdsa.VerifyingKey, only built for callers that need the ecdsa object '''
+        if self._verifying_key is None :
+            if self._signing_key is not None :
+                self._verifying_key = self._signing_key.get_verifying_key()
+            else :
+                point = ecdsa.ellipticcurve.Point(ecdsa.SECP256k1.curve, self._point[0], self._point[1], ecmult.N)
+                self._verifying_key = ecdsa.VerifyingKey.from_public_point(point, curve=ecdsa.SECP256k1)
+        return self._verifying_key
+
+    def precompute(self, window=4) :
+        ''' build a table for this key's public point, speeds up verify with this key '''
+        self._table = ecmult.FixedBaseTable(self._point, window)
+        return self
 
     def __str__(self) :
         return self.to_public()
@@ -70,11 +233,11 @@ class EOSKey(Signer) :
             if key_type :
                 check += hexlify(bytearray(key_type,'utf-8')).decode()
             chksum = ripemd160(unhexlify(check))[:8]
-        return base58.b58encode(unhexlify(key_buffer+chksum))
+        return b58encode(unhexlify(key_buffer+chksum)).encode('ascii')
    
     def _check_decode(self, key_string, key_type=None) :
         '''    '''
-        buffer = hexlify(base58.b58decode(key_string)).decode()
+        buffer = b58decode(key_string).hex()
         chksum = buffer[-8:]
         key = buffer[:-8]
         if key_type == 'sha256x2' :
@@ -97,42 +260,22 @@ class EOSKey(Signer) :
             http://www.secg.org/sec1-v2.pdf
         '''
         curve = ecdsa.SECP256k1.curve
-        G = ecdsa.SECP256k1.generator
         order = ecdsa.SECP256k1.order
-        yp = (i %2)
         r, s = ecdsa.util.sigdecode_string(signature, order)
-        x = r + (i // 2 ) * order
-        alpha = ((x * x * x) + (curve.a() * x) + curve.b()) % curve.p()
-        beta = ecdsa.numbertheory.square_root_mod_prime(alpha, curve.p())
-        y = beta if (beta - yp) % 2 == 0 else curve.p() - beta
-        # generate R
-        R = ecdsa.ellipticcurve.Point(curve, x, y, order)
-        e = ecdsa.util.string_to_number(digest)
-        # compute Q
-        Q = ecdsa.numbertheory.inverse_mod(r, order) * (s * R + (-e % order) * G)
+        backend = get_backend()
+        Q = backend.recover(r, s, i, digest)
         # verify message
-        if not ecdsa.VerifyingKey.from_public_point(Q, curve=ecdsa.SECP256k1).verify_digest(signature, digest,
-                                                                                            sigdecode=ecdsa.util.sigdecode_string) :
+        if Q is None or not backend.verify(Q, r, s, digest) :
             return None
-        return ecdsa.VerifyingKey.from_public_point(Q, curve=ecdsa.SECP256k1)
+        return ecdsa.VerifyingKey.from_public_point(ecdsa.ellipticcurve.Point(curve, Q[0], Q[1], order),
+                                                    curve=ecdsa.SECP256k1)
         
-    def _recovery_pubkey_param(self, digest, signature) :
-        ''' Use to derive a number that will allow for the easy recovery
-            of the public key from the signature
-        '''
-        for i in range(0,4) :
-            p = self._recover_key(digest, signature, i)
-            if (p.to_string() == self._vk.to_string()) :
-                return i
-
     def _compress_pubkey(self) :
         ''' '''
-        order = self._sk.curve.generator.order()
-        p = self._vk.pubkey.point
-        x_str = ecdsa.util.number_to_string(p.x(), order)
-        hex_data = bytearray(chr(2 + (p.y() & 1)), 'utf-8')
-        compressed = hexlify(hex_data + x_str).decode()
-        return compressed
+        if self._compressed is None :
+            x, y = self._point
+            self._compressed = hexlify(bytes([2 + (y & 1)]) + x.to_bytes(32, 'big')).decode()
+        return self._compressed
 
     def _is_canonical(self, sig):
         print("sig: " + str(sig))
@@ -144,13 +287,17 @@ class EOSKey(Signer) :
 
     def to_public(self) :
         ''' '''
-        cmp = self._compress_pubkey()
-        return 'EOS' + self._check_encode(cmp).decode()
+        if self._public is None :
+            cmp = self._compress_pubkey()
+            self._public = 'EOS' + self._check_encode(cmp).decode()
+        return self._public
         
     def to_wif(self) :
         ''' '''
-        pri_key = '80' + hexlify(self._sk.to_string()).decode()
-        return self._check_encode(pri_key, 'sha256x2').decode()
+        if self._wif is None :
+            pri_key = '80' + self._secret.to_bytes(32, 'big').hex()
+            self._wif = self._check_encode(pri_key, 'sha256x2').decode()
+        return self._wif
 
     def sign_string(self, data, encoding="utf-8"):
         ''' '''
@@ -164,41 +311,44 @@ class EOSKey(Signer) :
         digest = unhexlify(digest)
         if len(digest) != 32 :
             raise ValueError("32 byte buffer required")
+        backend = get_backend()
+        order = ecmult.N
+        secret = self._secret
+        e = ecdsa.util.string_to_number(digest)
         while 1 :
             # get deterministic k
             if cnt:
                 sha_digest = hashlib.sha256(digest + bytearray(cnt)).digest()
             else :
                 sha_digest = hashlib.sha256(digest).digest()
-            k = ecdsa.rfc6979.generate_k( self._sk.curve.generator.order(),
-                                          self._sk.privkey.secret_multiplier,
+            k = ecdsa.rfc6979.generate_k( order,
+                                          secret,
                                           hashlib.sha256,
                                         #   hashlib.sha256(digest + struct.pack('d', time.time())).digest() # use time to randomize
                                           sha_digest
                                           )
-            # sign the message
-            sigder = self._sk.sign_digest(digest, sigencode=ecdsa.util.sigencode_der, k=k)
-
-            # reformat sig
-            r, s = ecdsa.util.sigdecode_der(sigder, self._sk.curve.generator.order())
-            sig = ecdsa.util.sigencode_string(r, s, self._sk.curve.generator.order())
-
-            sigder = array.array('B', sigder)
-            # ensure signature is canonical
-            lenR = sigder[3]
-            lenS = sigder[5 + lenR]
-            
-            if lenR == 32 and lenS == 32:
-                # derive recover parameter
-                i = self._recovery_pubkey_param(digest, sig)
-                # compact
-                i += 27
-                # compressed
-                i += 4
-                sigstr = struct.pack('<B', i) + sig
-                break
-                # if self._is_canonical(sigstr):
-                #     break    
+            # sign the message, keeping the nonce point R for the recovery parameter
+            Rx, Ry = backend.generator_mul(k)
+            r = Rx % order
+            s = (ecdsa.numbertheory.inverse_mod(k, order) * (e + (secret * r) % order)) % order
+            if r and s :
+                sigder = array.array('B', ecdsa.util.sigencode_der(r, s, order))
+                # ensure signature is canonical
+                lenR = sigder[3]
+                lenS = sigder[5 + lenR]
+
+                if lenR == 32 and lenS == 32:
+                    sig = ecdsa.util.sigencode_string(r, s, order)
+                    # recovery parameter: parity of R.y, +2 when R.x overflowed the order
+                    i = (Ry & 1) | (2 if Rx >= order else 0)
+                    # compact
+                    i += 27
+                    # compressed
+                    i += 4
+                    sigstr = struct.pack('<B', i) + sig
+                    break
+                    # if self._is_canonical(sigstr):
+                    #     break    
             cnt +=1 
             if not cnt % 10 :
                 print('Still searching for a signature. Tried {} times.'.format(cnt))        
@@ -223,9 +373,14 @@ class EOSKey(Signer) :
         # p = self._recover_key(unhexlify(digest), unhexlify(sig), recover_param)
         #return self._vk.verify_digest(unhexlify(sig), unhexlify(digest), sigdecode=ecdsa.util.sigdecode_string)
         # return p.to_string() == self._vk.to_string()
-        try:
-            self._vk.verify_digest(unhexlify(sig), unhexlify(digest), sigdecode=ecdsa.util.sigdecode_string)
-        except ecdsa.keys.BadSignatureError:
-            return False
-        return True
+        r, s = ecdsa.util.sigdecode_string(unhexlify(sig), ecmult.N)
+        return get_backend().verify(self._point, r, s, unhexlify(digest), self._table)
         
+
+# parsed keys are shared process wide so repeated pushes with a WIF do not rederive the key
+KEY_CACHE_SIZE = 1024
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def get_key(wif) :
+    ''' EOSKey for the private key string wif, parsed once per process '''
+    return EOSKey(wif)
@@ -1,14 +1,47 @@
 import struct
+from decimal import Decimal
+from eospy.exceptions import EOSSerializationError
 from eospy.utils import string_to_name, name_to_string
 from eospy.utils import stringToPublicKey, publicKeyToString, stringToSignature, signatureToString
 from eospy.utils import signatureDataSize, publicKeyDataSize
 from eospy.utils import decimalToBinary, binaryToDecimal, dateToTimePoint, timePointToDate, dateToTimePointSec, timePointSecToDate
  
+# precompiled little endian formats
+_UINT16 = struct.Struct("<H")
+_INT16 = struct.Struct("<h")
+_UINT32 = struct.Struct("<I")
+_INT32 = struct.Struct("<i")
+_UINT64 = struct.Struct("<Q")
+_INT64 = struct.Struct("<q")
+_FLOAT32 = struct.Struct("<f")
+_FLOAT64 = struct.Struct("<d")
+
+# format string -> Struct for push_many
+_STRUCTS = {}
+
+def _get_struct(fmt):
+    if isinstance(fmt, struct.Struct):
+        return fmt
+    st = _STRUCTS.get(fmt)
+    if st is None:
+        st = _STRUCTS[fmt] = struct.Struct(fmt)
+    return st
+
 class SerialBuffer:
      
-    def __init__(self, array=None):
-        assert (array is None or isinstance(array, bytearray)), "Invalid parameter, must be bytearray"
-        self.array = array or bytearray()
+    def __init__(self, array=None, zero_copy=False):
+        '''
+        zero_copy opens the buffer in read mode over a bytes-like array (bytes, bytearray or memoryview),
+        blobs such as getBytes/getUint8Array are then returned as memoryview slices instead of copies
+        and the buffer cannot be written to
+        '''
+        if zero_copy:
+            assert (isinstance(array, (bytes, bytearray, memoryview))), "Invalid parameter, must be bytes-like"
+            self.array = memoryview(array).cast("B") if isinstance(array, memoryview) else memoryview(array)
+        else:
+            assert (array is None or isinstance(array, bytearray)), "Invalid parameter, must be bytearray"
+            self.array = array or bytearray()
+        self.zero_copy = zero_copy
         self.readPos = 0
     
     @property
@@ -38,101 +71,102 @@ class SerialBuffer:
         self.array.extend(array)
         
     def push(self, *vars):
-        self.array.extend(list(vars))
+        self.array.extend(vars)
+
+    def push_many(self, fmt, values):
+        ''' pack a run of fixed width fields in one call, fmt is a struct format such as "<IHI" '''
+        self.array += _get_struct(fmt).pack(*values)
         
     def get(self):
         if self.readPos < self.length:
             m = self.array[self.readPos]
             self.readPos += 1
             return m
-        raise Exception({"message": "Read past end of buffer"})
+        raise EOSSerializationError({"message": "Read past end of buffer"})
     
     def pushUint8Array(self, array, length):
         if len(array) != length:
-            raise Exception({"message": "Binary data has incorrect size"})
+            raise EOSSerializationError({"message": "Binary data has incorrect size"})
         self.pushArray(array)
         
     def getUint8Array(self, length):
         if self.readPos + length > self.length:
-            raise Exception({"message": "Read past end of buffer"})
+            raise EOSSerializationError({"message": "Read past end of buffer"})
+        # slicing the memoryview in read mode is a view, slicing the bytearray is a copy
         array = self.array[self.readPos:self.readPos+length]
         self.readPos += length
         return array
+
+    def _unpack(self, fmt):
+        pos = self.readPos
+        if pos + fmt.size > self.length:
+            raise EOSSerializationError({"message": "Read past end of buffer"})
+        self.readPos = pos + fmt.size
+        return fmt.unpack_from(self.array, pos)[0]
     
     def pushBool(self, v):
         if not isinstance(v, bool):
-            raise Exception({"message": "Read past end of buffer"})
+            raise EOSSerializationError({"message": "Expected bool"})
         self.push(1 if v else 0)
         
     def getBool(self):
-        v = self.get()
-        return 0 if v == 0 else 1
+        return self.get() != 0
     
     def pushUint8(self, v):
         if v != (v & 0xff):
-            raise Exception({"message": "data is out of range"})
+            raise EOSSerializationError({"message": "data is out of range"})
         self.push(v)
         
     def getUint8(self):
         return self.get()
     
     def pushInt8(self, v):
-        if v != (v << 24 >> 24):
-            raise Exception({"message": "data is out of range"})
-        self.push(v)
+        if not -0x80 <= v < 0x80:
+            raise EOSSerializationError({"message": "data is out of range"})
+        self.push(v & 0xff)
         
     def getInt8(self):
-        return self.get() << 24 >> 24
+        # python ints do not wrap, sign extend by hand
+        v = self.get()
+        return v - 0x100 if v & 0x80 else v
     
     def pushUint16(self, v): 
-        data = struct.pack("<H", v)
-        self.pushArray(data)
+        self.array += _UINT16.pack(v)
         
     def getUint16(self):
-        v = struct.unpack("<H", self.getUint8Array(2))[0]
-        return v
+        return self._unpack(_UINT16)
     
     def pushInt16(self, v):
         if v != (v << 16 >> 16):
-            raise Exception({"message": "data is out of range"})
-        data = struct.pack("<h", v)
-        self.pushArray(data)
+            raise EOSSerializationError({"message": "data is out of range"})
+        self.array += _INT16.pack(v)
         
     def getInt16(self):
-        v = struct.unpack("<h", self.getUint8Array(2))[0]
-        return v
+        return self._unpack(_INT16)
         
     def pushUint32(self, v):
-        data = struct.pack("<I", v)
-        self.pushArray(data)
+        self.array += _UINT32.pack(v)
         
     def getUint32(self):
-        v = struct.unpack("<I", self.getUint8Array(4))[0]
-        return v
+        return self._unpack(_UINT32)
     
     def pushInt32(self, v):
-        data = struct.pack("<i", v)
-        self.pushArray(data)
+        self.array += _INT32.pack(v)
         
     def getInt32(self):
-        v = struct.unpack("<i", self.getUint8Array(4))[0]
-        return v
+        return self._unpack(_INT32)
     
     def pushUint64(self, v):
-        data = struct.pack("<Q", v)
-        self.pushArray(data)
+        self.array += _UINT64.pack(v)
         
     def getUint64(self):
-        v = struct.unpack("<Q", self.getUint8Array(8))[0]
-        return v
+        return self._unpack(_UINT64)
     
     def pushInt64(self, v):
-        data = struct.pack("<q", v)
-        self.pushArray(data)
+        self.array += _INT64.pack(v)
         
     def getInt64(self):
-        v = struct.unpack("<q", self.getUint8Array(8))[0]
-        return v
+        return self._unpack(_INT64)
     
     def pushVarUint32(self, v):
         while True:
@@ -165,31 +199,26 @@ class SerialBuffer:
             return v >> 1
         
     def pushFloat32(self, v):
-        data = struct.pack("<f", v)
-        self.pushArray(data)
+        self.array += _FLOAT32.pack(v)
         
     def getFloat32(self):
-        v = struct.unpack("<f", self.getUint8Array(4))[0]
+        v = self._unpack(_FLOAT32)
         v = round(v, 7)
         return v
     
     def pushFloat64(self, v):
-        data = struct.pack("<d", v)
-        self.pushArray(data)
+        self.array += _FLOAT64.pack(v)
         
     def getFloat64(self):
-        v = struct.unpack("<d", self.getUint8Array(8))[0]
-        return v
+        return self._unpack(_FLOAT64)
     
     def pushName(self, s):
         if (not isinstance(s, str)):
-            raise Exception({"message": "Expected string containing name"})
-        data = struct.pack("<Q", string_to_name(s))
-        self.pushArray(data)
+            raise EOSSerializationError({"message": "Expected string containing name"})
+        self.array += _UINT64.pack(string_to_name(s))
         
     def getName(self):
-        v = struct.unpack("<Q", self.getUint8Array(8))[0]
-        return name_to_string(v)
+        return name_to_string(self._unpack(_UINT64))
     
     def pushBytes(self, v):
         self.pushVarUint32(len(v))
@@ -204,11 +233,11 @@ class SerialBuffer:
         
     def getString(self):
         data = self.getBytes()
-        return data.decode("utf-8")
+        return str(data, "utf-8")
     
     def pushSymbolCode(self, name):
         if (not isinstance(name, str)):
-            raise Exception({"message": "Expected string containing symbol_code"})
+            raise EOSSerializationError({"message": "Expected string containing symbol_code"})
         a = []
         a += name.encode("utf-8")
         while (len(a) < 8):
@@ -222,7 +251,7 @@ class SerialBuffer:
             if not d:
                 break
             l += 1
-        name = a[:l].decode("utf-8")
+        name = str(a[:l], "utf-8")
         return name
     
     def pushSymbol(self, name, precision):
@@ -240,16 +269,19 @@ class SerialBuffer:
             if not d:
                 break
             l += 1
-        name = a[:l].decode("utf-8")
+        name = str(a[:l], "utf-8")
         return (name, precision)
     
     def pushAsset(self, asset, precision=None):
         if (not isinstance(asset, str)):
-            raise Exception({"message": "Expected string containing asset"})
+            raise EOSSerializationError({"message": "Expected string containing asset"})
         a = asset.split(" ")
         if not precision:
-            precision = len(a[0].split(".")[1])
-        amount = int(float(a[0]) * (10 **precision))
+            # "1 EOS" has precision 0
+            parts = a[0].split(".")
+            precision = len(parts[1]) if len(parts) > 1 else 0
+        # scale the decimal string exactly, float math would turn 0.0003 into 2
+        amount = int((Decimal(a[0]) * (10 ** precision)).to_integral_value())
         symbol = a[1]
         self.pushInt64(amount)
         self.pushSymbol(symbol, precision)
@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
 
 class Signer(ABC):
+    # no instance dict so subclasses can use __slots__
+    __slots__ = ()
+
     def __init__(self, private_str=''):
         super().__init__()
     
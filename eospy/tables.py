@@ -0,0 +1,182 @@
+#
+# tables.py
+#
+# paging through get_table_rows, the next page is fetched while the caller
+# works through the current one
+#
+import asyncio
+import queue
+import threading
+from collections import deque
+from itertools import islice
+from .exceptions import EOSTablePaginationError
+
+# end of the table marker passed from the fetching side to the consumer
+_DONE = object()
+
+def next_lower_bound(res) :
+    ''' lower_bound of the page after the get_table_rows result res, None after the last page '''
+    more = res.get('more')
+    if not more :
+        return None
+    next_key = res.get('next_key')
+    if next_key :
+        return next_key
+    # a few nodeos releases returned the next key in more itself
+    if isinstance(more, str) :
+        return more
+    raise EOSTablePaginationError('the node returned more rows without a next_key')
+
+def table_pages(fetch, lower_bound='') :
+    ''' yield the rows of every page, fetch(lower_bound) returns one get_table_rows result '''
+    while lower_bound is not None :
+        res = fetch(lower_bound)
+        yield res['rows']
+        lower_bound = next_lower_bound(res)
+
+def iter_rows(fetch, lower_bound='', prefetch=1) :
+    ''' every row from table_pages, up to prefetch pages are fetched ahead on a thread, 0 fetches inline '''
+    if not prefetch :
+        for rows in table_pages(fetch, lower_bound) :
+            for row in rows :
+                yield row
+        return
+    pages = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def put(item) :
+        # give up once the consumer went away instead of blocking on a full queue
+        while not stop.is_set() :
+            try :
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full :
+                pass
+        return False
+
+    def produce() :
+        try :
+            for rows in table_pages(fetch, lower_bound) :
+                if not put(rows) :
+                    return
+            put(_DONE)
+        except Exception as exc :
+            put(exc)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try :
+        while True :
+            rows = pages.get()
+            if rows is _DONE :
+                return
+            if isinstance(rows, Exception) :
+                raise rows
+            for row in rows :
+                yield row
+    finally :
+        stop.set()
+
+async def atable_pages(fetch, lower_bound='') :
+    ''' async table_pages, fetch(lower_bound) is a coroutine function '''
+    while lower_bound is not None :
+        res = await fetch(lower_bound)
+        yield res['rows']
+        lower_bound = next_lower_bound(res)
+
+async def aiter_rows(fetch, lower_bound='', prefetch=1) :
+    ''' async iter_rows, the pages ahead are fetched by a task '''
+    if not prefetch :
+        async for rows in atable_pages(fetch, lower_bound) :
+            for row in rows :
+                yield row
+        return
+    pages = asyncio.Queue(maxsize=prefetch)
+
+    async def produce() :
+        try :
+            async for rows in atable_pages(fetch, lower_bound) :
+                await pages.put(rows)
+            await pages.put(_DONE)
+        except Exception as exc :
+            await pages.put(exc)
+
+    task = asyncio.ensure_future(produce())
+    try :
+        while True :
+            rows = await pages.get()
+            if rows is _DONE :
+                return
+            if isinstance(rows, Exception) :
+                raise rows
+            for row in rows :
+                yield row
+    finally :
+        task.cancel()
+
+#####
+# parallel scans
+#####
+
+UINT64_MAX = (1 << 64) - 1
+
+def split_key_range(shards, lower_bound=None, upper_bound=None) :
+    ''' split the inclusive primary key range into shards (lower, upper) string bounds '''
+    lower = int(lower_bound) if lower_bound not in (None, '') else 0
+    upper = int(upper_bound) if upper_bound not in (None, '') else UINT64_MAX
+    shards = max(1, min(shards, upper - lower + 1))
+    step = (upper - lower + 1) // shards
+    ranges = []
+    for i in range(shards) :
+        start = lower + i * step
+        end = upper if i == shards - 1 else start + step - 1
+        ranges.append((str(start), str(end)))
+    return ranges
+
+async def scan_rows(fetch, ranges, concurrency=8, ordered=True, prefetch=1) :
+    ''' yield (scope, row) for every (scope, lower_bound, upper_bound) in ranges
+
+        fetch(scope, lower_bound, upper_bound) is a coroutine function returning one get_table_rows
+        result. At most concurrency ranges are paged at once, each one page at a time, so that is
+        also the number of requests in flight. ordered yields range by range in the order given,
+        the ranges ahead buffer up to prefetch pages each; otherwise pages are yielded as they arrive.
+    '''
+    ranges = iter(ranges)
+    prefetch = max(prefetch, 1)
+    shared = None if ordered else asyncio.Queue(maxsize=concurrency * prefetch)
+    # output queue of every started range that has not finished, in range order
+    queues = deque()
+    tasks = []
+
+    async def produce(out, scope, lower, upper) :
+        try :
+            async for rows in atable_pages(lambda bound : fetch(scope, bound, upper), lower) :
+                await out.put((scope, rows))
+            await out.put((scope, _DONE))
+        except Exception as exc :
+            await out.put((scope, exc))
+
+    def start() :
+        for scope, lower, upper in islice(ranges, 1) :
+            out = shared if shared is not None else asyncio.Queue(maxsize=prefetch)
+            queues.append(out)
+            tasks[:] = [task for task in tasks if not task.done()]
+            tasks.append(asyncio.ensure_future(produce(out, scope, lower, upper)))
+
+    for _ in range(concurrency) :
+        start()
+    try :
+        while queues :
+            # unordered ranges all share one queue so any of them can be the one that finished
+            scope, rows = await queues[0].get()
+            if rows is _DONE :
+                queues.popleft()
+                start()
+                continue
+            if isinstance(rows, Exception) :
+                raise rows
+            for row in rows :
+                yield scope, row
+    finally :
+        for task in tasks :
+            task.cancel()
@@ -0,0 +1,90 @@
+#
+# tapos.py
+#
+import asyncio
+import threading
+import time
+
+class TaposCache :
+    ''' Holds the (chain_info, lib_info) pair used as the TAPOS reference for new transactions.
+
+        Any irreversible block from the last ~9 hours is a valid reference so the pair only
+        needs refreshing every refresh_interval seconds instead of on every push.
+    '''
+    def __init__(self, refresh_interval=60) :
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._chain_info = None
+        self._lib_info = None
+        self._updated = 0
+        self._thread = None
+        self._stop = None
+        self._task = None
+
+    def get(self) :
+        ''' return the cached pair or None when it is missing or stale '''
+        with self._lock :
+            if self._chain_info is None or not self.refresh_interval :
+                return None
+            if time.monotonic() - self._updated > self.refresh_interval :
+                return None
+            return self._chain_info, self._lib_info
+
+    def set(self, chain_info, lib_info) :
+        with self._lock :
+            self._chain_info = chain_info
+            self._lib_info = lib_info
+            self._updated = time.monotonic()
+
+    def invalidate(self) :
+        with self._lock :
+            self._chain_info = None
+            self._lib_info = None
+
+    #####
+    # background refresh
+    #####
+
+    def start(self, fetch) :
+        ''' refresh from fetch() in a daemon thread, fetch returns (chain_info, lib_info) '''
+        if self._thread is not None :
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(fetch, self._stop), daemon=True)
+        self._thread.start()
+
+    def _run(self, fetch, stop) :
+        while not stop.is_set() :
+            try :
+                self.set(*fetch())
+            except Exception :
+                # keep the previous reference, get() will report it stale if it ages out
+                pass
+            stop.wait(self._sleep_interval())
+
+    def stop(self) :
+        if self._thread is not None :
+            self._stop.set()
+            self._thread = None
+        if self._task is not None :
+            self._task.cancel()
+            self._task = None
+
+    def async_start(self, fetch, loop) :
+        ''' refresh from the coroutine function fetch in a task on loop '''
+        if self._task is None :
+            self._task = loop.create_task(self._async_run(fetch))
+
+    async def _async_run(self, fetch) :
+        while True :
+            try :
+                self.set(*(await fetch()))
+            except asyncio.CancelledError :
+                raise
+            except Exception :
+                pass
+            await asyncio.sleep(self._sleep_interval())
+
+    def _sleep_interval(self) :
+        # refresh at half the interval so callers never see a stale pair
+        return max(self.refresh_interval / 2.0, 0.1)
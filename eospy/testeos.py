@@ -75,7 +75,7 @@ class TestEos:
                     "permission": authorization['permission'],
                 }],
             }
-            data = ce.abi_json_to_bin(payload['account'], payload['name'], action['parameters'])
+            data = ce.json_to_bin(payload['account'], payload['name'], action['parameters'])
             payload['data']=data['binargs']
             trx = {'actions': [payload]}
             try:
@@ -7,7 +7,7 @@ from .schema import (ActionSchema, PermissionLevelSchema, ChainInfoSchema, Block
 import datetime as dt
 import pytz
 from .utils import sha256, string_to_name, name_to_string, int_to_hex, hex_to_int, char_subtraction
-from .exceptions import EOSBufferInvalidType, EOSInvalidSchema, EOSUnknownObj, EOSAbiProcessingError
+from .exceptions import EOSBufferInvalidType, EOSInvalidSchema, EOSUnknownObj, EOSAbiProcessingError, EOSSerializationError
 import json
 import binascii
 import struct
@@ -108,139 +108,59 @@ class VarUInt :
         return buf.getVarUint32()
     
 class EOSBuffer(SerialBuffer) :
-    def __init__(self, array=None) :
-        super(EOSBuffer, self).__init__(array)
-            
+    # exact type -> codec, subclasses resolve through their MRO and are cached per class
+    _encoders = {}
+    _decoders = {}
+    _encoder_cache = {}
+    _decoder_cache = {}
+
+    def __init__(self, array=None, zero_copy=False) :
+        super(EOSBuffer, self).__init__(array, zero_copy)
+
+    @classmethod
+    def register_encoder(cls, obj_type, encoder) :
+        ''' encode values of obj_type (and its subclasses) with encoder(buf, val) '''
+        EOSBuffer._encoders[obj_type] = encoder
+        EOSBuffer._encoder_cache.clear()
+
+    @classmethod
+    def register_decoder(cls, obj_type, decoder) :
+        ''' decode sample types of obj_type (and its subclasses) with decoder(buf, objType) '''
+        EOSBuffer._decoders[obj_type] = decoder
+        EOSBuffer._decoder_cache.clear()
+
+    @staticmethod
+    def _lookup(codecs, cache, obj_type) :
+        try :
+            return cache[obj_type]
+        except KeyError :
+            pass
+        codec = None
+        for klass in obj_type.__mro__ :
+            if klass in codecs :
+                codec = codecs[klass]
+                break
+        cache[obj_type] = codec
+        return codec
+
     def decode(self, objType, buf=None):
         if not buf:
             buf = self
-        if isinstance(objType, UInt32):
-            val = buf.getUint32()
-        elif isinstance(objType, UInt16):
-            val = buf.getUint16()
-        elif isinstance(objType, UInt64):
-            val = buf.getUint64()
-        elif isinstance(objType, Uint128):
-            val = buf.getUint128()
-        elif isinstance(objType, VarUInt):
-            val = objType.decode(buf)
-        elif(isinstance(objType, Byte) or
-             isinstance(objType, bool)) :
-            val = buf.get()
-        elif isinstance(objType, Float):
-            val = buf.getFloat64()
-        elif(isinstance(objType, int) or
-             isinstance(objType, long)) :
-            val = buf.getInt32()
-        elif isinstance(objType, Checksum256):
-            val = buf.getChecksum256()
-        elif isinstance(objType, PublicKey):
-            val = buf.getPublicKey()
-        elif (isinstance(objType, Name) or
-             isinstance(objType, AccountName) or
-             isinstance(objType, PermissionName) or
-             isinstance(objType, ActionName) or
-             isinstance(objType, TableName) or
-             isinstance(objType, ScopeName) ) :
-            val = buf.getName()
-        elif isinstance(objType, str):
-            val = buf.getString()
-        elif isinstance(objType, TimePointSec):
-            val = buf.getTimePointSec()
-        elif isinstance(objType, Optional):
-            has = buf.getUint8()
-            if has == 0:
-                val = None
-            else:
-                val = buf.decode(objType.value)
-        elif(isinstance(objType, Asset)):
-            val = buf.getAsset()
-        elif(isinstance(objType, list)) :
-            # get count(VarUint)
-            val = []
-            length = buf.getVarUint32()
-            while len(val) < length:
-                out = buf.decode(objType[0])
-                val.append(out)
-        elif isinstance(objType, OrderedDict):
-            val = OrderedDict()
-            for key, oType in objType.items():
-                val[key] = buf.decode(oType)
-        else:
+        decoder = self._lookup(self._decoders, self._decoder_cache, type(objType))
+        if decoder is None:
             raise EOSBufferInvalidType("Cannot decode type: {}".format(type(objType)))
-        return val
+        return decoder(buf, objType)
 
     def encode(self, val=None, buf=None) :
         if val is None :
             return
         if not buf:
             buf = self
-        if (isinstance(val, Name) or
-           isinstance(val, AccountName) or
-           isinstance(val, PermissionName) or
-           isinstance(val, ActionName) or
-           isinstance(val, TableName) or
-           isinstance(val, ScopeName) ) :
-            buf.pushName(val)
-        elif(isinstance(val, str)) :
-            buf.pushString(val)
-        elif(isinstance(val, Byte)):
-            buf.push(val)
-        elif(isinstance(val, bool)) :
-            buf.pushBool(val)
-        elif(isinstance(val, UInt16)) :
-            buf.pushUint16(val)
-        elif(isinstance(val,UInt32)) :
-            buf.pushUint32(val)
-        elif(isinstance(val,UInt64)) :
-            buf.pushUint64(val)
-        elif(isinstance(val, Uint128)):
-            buf.pushUint128(val)
-        elif(isinstance(val, Checksum256)):
-            buf.pushChecksum256(str(val))
-        elif(isinstance(val, PublicKey)):
-            buf.pushPublicKey(str(val))
-        elif(isinstance(val, TimePointSec)):
-            buf.pushTimePointSec(str(val))
-        elif(isinstance(val, TimePoint)):
-            buf.pushTimePoint(str(val))
-        elif(isinstance(val, Float)):
-            buf.pushFloat32(val)
-        elif(isinstance(val, VarUInt)) :
-            val.encode(buf)
-        elif(isinstance(val, int) or
-             isinstance(val, long)) :
-            buf.pushInt32(val)
-        elif(isinstance(val, Action) or 
-             isinstance(val, AbiStruct) or 
-             isinstance(val, AbiStructField) or 
-             isinstance(val, AbiType) or
-             isinstance(val, AbiAction) or 
-             isinstance(val, AbiTable) or
-             isinstance(val, AbiRicardianClauses) or 
-             isinstance(val, AbiErrorMessages) or
-             isinstance(val, AbiExtensions) or 
-             isinstance(val, AbiVariants) or
-             isinstance(val, Asset) or
-             isinstance(val, Authority) or
-             isinstance(val, PermissionLevelWeight) or
-             isinstance(val, WaitWeight) or
-             isinstance(val, KeyWeight) or
-             isinstance(val, PermissionLevel)):
-            val.encode(buf)
-        elif(isinstance(val, Optional)):
-            if not val.value:
-                buf.pushUint8(0)
-            else:
-                buf.pushUint8(1)
-                buf.encode(val.value)
-        elif(isinstance(val, list)) :
-            buf.pushVarUint32(len(val))
-            for item in val :
-                self.encode(item, buf)
-        else :
+        encoder = self._lookup(self._encoders, self._encoder_cache, type(val))
+        if encoder is None :
             raise EOSBufferInvalidType('Cannot encode type: {}'.format(type(val)))
-        
+        encoder(buf, val)
+
 class BaseObject(object) :
     def __init__(self, d=None) :
         ''' '''
@@ -330,7 +250,7 @@ class Asset :
 class AbiType(BaseObject):
     def __init__(self, d):
         self._validator = AbiTypeSchema()
-        super(AbiTypes, self).__init__(d)
+        super(AbiType, self).__init__(d)
     
     def encode(self, buf):
         self._encode_buffer(self.new_type_name, buf)
@@ -468,6 +388,154 @@ class Authority(BaseObject):
         self._encode_buffer(self.accounts, buf)
         self._encode_buffer(self.waits, buf)
 
+# EOSBuffer codecs, keyed on the exact type so a subclass (e.g. AccountName) uses the
+# codec of its closest registered base (Name) the same way the old isinstance chain did
+def _decode_optional(buf, objType):
+    if buf.getUint8() == 0:
+        return None
+    return buf.decode(objType.value)
+
+def _decode_list(buf, objType):
+    val = []
+    length = buf.getVarUint32()
+    while len(val) < length:
+        val.append(buf.decode(objType[0]))
+    return val
+
+def _decode_ordered_dict(buf, objType):
+    val = OrderedDict()
+    for key, oType in objType.items():
+        val[key] = buf.decode(oType)
+    return val
+
+def _encode_optional(buf, val):
+    if not val.value:
+        buf.pushUint8(0)
+    else:
+        buf.pushUint8(1)
+        buf.encode(val.value)
+
+def _encode_list(buf, val):
+    buf.pushVarUint32(len(val))
+    for item in val :
+        buf.encode(item, buf)
+
+def _encode_object(buf, val):
+    val.encode(buf)
+
+for _type, _decoder in [
+        (UInt32, lambda buf, o: buf.getUint32()),
+        (UInt16, lambda buf, o: buf.getUint16()),
+        (UInt64, lambda buf, o: buf.getUint64()),
+        (Uint128, lambda buf, o: buf.getUint128()),
+        (VarUInt, lambda buf, o: o.decode(buf)),
+        (Byte, lambda buf, o: buf.get()),
+        (bool, lambda buf, o: buf.get()),
+        (Float, lambda buf, o: buf.getFloat64()),
+        (Int16, lambda buf, o: buf.getInt16()),
+        (Int64, lambda buf, o: buf.getInt64()),
+        (int, lambda buf, o: buf.getInt32()),
+        (Checksum256, lambda buf, o: buf.getChecksum256()),
+        (PublicKey, lambda buf, o: buf.getPublicKey()),
+        (Name, lambda buf, o: buf.getName()),
+        (str, lambda buf, o: buf.getString()),
+        (TimePointSec, lambda buf, o: buf.getTimePointSec()),
+        (Optional, _decode_optional),
+        (Asset, lambda buf, o: buf.getAsset()),
+        (list, _decode_list),
+        (OrderedDict, _decode_ordered_dict)]:
+    EOSBuffer.register_decoder(_type, _decoder)
+
+for _type, _encoder in [
+        (Name, lambda buf, v: buf.pushName(v)),
+        (str, lambda buf, v: buf.pushString(v)),
+        (Byte, lambda buf, v: buf.push(v)),
+        (bool, lambda buf, v: buf.pushBool(v)),
+        (UInt16, lambda buf, v: buf.pushUint16(v)),
+        (UInt32, lambda buf, v: buf.pushUint32(v)),
+        (UInt64, lambda buf, v: buf.pushUint64(v)),
+        (Uint128, lambda buf, v: buf.pushUint128(v)),
+        (Checksum256, lambda buf, v: buf.pushChecksum256(str(v))),
+        (PublicKey, lambda buf, v: buf.pushPublicKey(str(v))),
+        (TimePointSec, lambda buf, v: buf.pushTimePointSec(str(v))),
+        (TimePoint, lambda buf, v: buf.pushTimePoint(str(v))),
+        (Float, lambda buf, v: buf.pushFloat64(v)),
+        (VarUInt, lambda buf, v: v.encode(buf)),
+        (Int16, lambda buf, v: buf.pushInt16(v)),
+        (Int64, lambda buf, v: buf.pushInt64(v)),
+        (int, lambda buf, v: buf.pushInt32(v)),
+        (Action, _encode_object),
+        (AbiStruct, _encode_object),
+        (AbiStructField, _encode_object),
+        (AbiType, _encode_object),
+        (AbiAction, _encode_object),
+        (AbiTable, _encode_object),
+        (AbiRicardianClauses, _encode_object),
+        (AbiErrorMessages, _encode_object),
+        (AbiExtensions, _encode_object),
+        (AbiVariants, _encode_object),
+        (Asset, _encode_object),
+        (Authority, _encode_object),
+        (PermissionLevelWeight, _encode_object),
+        (WaitWeight, _encode_object),
+        (KeyWeight, _encode_object),
+        (PermissionLevel, _encode_object),
+        (Optional, _encode_optional),
+        (list, _encode_list)]:
+    EOSBuffer.register_encoder(_type, _encoder)
+
+# (encoder, decoder) pairs for the abi built-in types used by compiled abi plans.
+# encoders take (buf, value) and write the json value, decoders take buf and return it.
+def _push_symbol(buf, v):
+    precision, symbol = str(v).split(',')
+    buf.pushSymbol(symbol, int(precision))
+
+def _get_symbol(buf):
+    symbol, precision = buf.getSymbol()
+    return '{},{}'.format(precision, symbol)
+
+def _push_bytes(buf, v):
+    data = bytearray.fromhex(v) if isinstance(v, str) else v
+    buf.pushBytes(data)
+
+_ABI_BUILTIN_CODECS = {
+    'name': (lambda buf, v: buf.pushName(str(v)), lambda buf: buf.getName()),
+    'string': (lambda buf, v: buf.pushString(str(v)), lambda buf: buf.getString()),
+    'bool': (lambda buf, v: buf.pushBool(v), lambda buf: buf.getBool()),
+    'uint8': (lambda buf, v: buf.pushUint8(int(v)), lambda buf: buf.getUint8()),
+    'int8': (lambda buf, v: buf.pushInt8(int(v)), lambda buf: buf.getInt8()),
+    'uint16': (lambda buf, v: buf.pushUint16(int(v)), lambda buf: buf.getUint16()),
+    'uint32': (lambda buf, v: buf.pushUint32(int(v)), lambda buf: buf.getUint32()),
+    'uint64': (lambda buf, v: buf.pushUint64(int(v)), lambda buf: buf.getUint64()),
+    'uint128': (lambda buf, v: buf.pushUint128(v), lambda buf: buf.getUint128()),
+    'int16': (lambda buf, v: buf.pushInt16(int(v)), lambda buf: buf.getInt16()),
+    'int32': (lambda buf, v: buf.pushInt32(int(v)), lambda buf: buf.getInt32()),
+    'int64': (lambda buf, v: buf.pushInt64(int(v)), lambda buf: buf.getInt64()),
+    'float64': (lambda buf, v: buf.pushFloat64(float(v)), lambda buf: buf.getFloat64()),
+    'varuint32': (lambda buf, v: buf.pushVarUint32(int(v)), lambda buf: buf.getVarUint32()),
+    'bytes': (_push_bytes, lambda buf: buf.getBytes().hex()),
+    'asset': (lambda buf, v: buf.pushAsset(str(v)), lambda buf: buf.getAsset()),
+    'symbol': (_push_symbol, _get_symbol),
+    'symbol_code': (lambda buf, v: buf.pushSymbolCode(str(v)), lambda buf: buf.getSymbolCode()),
+    'checksum256': (lambda buf, v: buf.pushChecksum256(str(v)), lambda buf: buf.getChecksum256()),
+    'time_point': (lambda buf, v: buf.pushTimePoint(str(v)), lambda buf: buf.getTimePoint()),
+    'time_point_sec': (lambda buf, v: buf.pushTimePointSec(str(v)), lambda buf: buf.getTimePointSec()),
+    'public_key': (lambda buf, v: buf.pushPublicKey(str(v)), lambda buf: buf.getPublicKey()),
+}
+
+# what the python conversions in the codecs (int(), Decimal, bytes.fromhex, struct.pack, ...) raise for
+# values that do not fit the abi type, encode_struct reports them as EOSSerializationError
+_VALUE_ERRORS = (ValueError, TypeError, LookupError, ArithmeticError, AttributeError, struct.error)
+
+# types with an eospy class, used when the abi does not define the struct itself
+_ABI_OBJECT_TYPES = {
+    'authority': Authority,
+    'permission_level': PermissionLevel,
+    'permission_level_weight': PermissionLevelWeight,
+    'key_weight': KeyWeight,
+    'wait_weight': WaitWeight,
+}
+
 class Abi(BaseObject):
     _abi_map = {
         # name
@@ -515,13 +583,26 @@ class Abi(BaseObject):
         self.error_messages = self._create_obj_array(self.error_messages, AbiErrorMessages)
         self.abi_extensions = self._create_obj_array(self.abi_extensions, AbiExtensions)
         self.variants = self._create_obj_array(self.variants, AbiVariants)
+        # name indexes so lookups never rescan the lists, the first definition wins like the old scans
+        self._action_index = self._create_index(self.actions, 'name')
+        self._struct_index = self._create_index(self.structs, 'name')
+        self._type_index = self._create_index(self.types, 'new_type_name')
+        self._table_index = self._create_index(self.tables, 'name')
+        self._plans = {}
+
+    def _create_index(self, arr, attr):
+        ''' '''
+        index = {}
+        for item in arr:
+            index.setdefault(getattr(item, attr), item)
+        return index
 
     def get_action(self, name):
         ''' '''
-        for act in self.actions:
-            if act.name == name:
-                return act
-        raise EOSUnknownObj('{} is not a valid action for this contract'.format(name))
+        try:
+            return self._action_index[name]
+        except KeyError:
+            raise EOSUnknownObj('{} is not a valid action for this contract'.format(name))
 
     def get_actions(self):
         actions = []
@@ -531,11 +612,20 @@ class Abi(BaseObject):
 
     def get_struct(self, name):
         ''' '''
-        for struct in self.structs:
-            if struct.name == name:
-                return struct
         #raise EOSUnknownObj('{} is not a valid struct for this contract'.format(name))
-        return None
+        return self._struct_index.get(name)
+
+    def get_table(self, name):
+        ''' '''
+        return self._table_index.get(name)
+
+    def resolve_type(self, name):
+        ''' follow the abi type aliases (e.g. account_name -> name) down to the real type '''
+        seen = set()
+        while name in self._type_index and name not in seen:
+            seen.add(name)
+            name = self._type_index[name].type
+        return name
 
     def get_action_parameters(self, name):
         ''' '''
@@ -545,6 +635,7 @@ class Abi(BaseObject):
         for field in struct.fields:
             f = field.type.strip('[]')
             f = f.strip("?")
+            f = self.resolve_type(f)
             if(f in self._abi_map):
                 field_type = self._abi_map[f]
                 # check if the field is a list
@@ -586,32 +677,139 @@ class Abi(BaseObject):
         self._encode_buffer(VarUInt(len(raw_abi)/2), buf)
         return "{}{}".format(buf.getHex(), raw_abi)
     
-    def _loop_type(self, params, data, buf):
-        if data is None:
-            self._encode_buffer(VarUInt("0"), buf)
-            return
-        for field in data:
-            # create EOSBuffer with value as a type of field
-            if isinstance(params[field], list):
-                field_type = type(params[field][0])
-                arr = []
-                for f in data[field]: 
-                    #print(f)
-                    arr.append(field_type(f))
-                self._encode_buffer(arr, buf)
-            elif isinstance(params[field], OrderedDict):
-                self._loop_type(params[field], data[field], buf)
+    #####
+    # compiled codecs
+    #####
+
+    def compile(self, names=None):
+        ''' build the encode/decode plans for names (all structs by default) ahead of use '''
+        for name in (names if names is not None else self._struct_index):
+            self.get_plan(name)
+        return self
+
+    def get_plan(self, name):
+        ''' return the cached [(field, encoder, decoder, optional)] plan for struct name '''
+        plans = self._plans
+        if name in plans:
+            return plans[name]
+        struct = self.get_struct(name)
+        if struct is None:
+            raise EOSUnknownObj("{} is not a known abi struct".format(name))
+        # register before filling so recursive structs resolve to the same list
+        plan = plans[name] = []
+        try:
+            if struct.base:
+                plan.extend(self.get_plan(self.resolve_type(struct.base)))
+            for field in struct.fields:
+                encoder, decoder = self._compile_type(field.type)
+                plan.append((field.name, encoder, decoder, field.type.endswith('?')))
+        except Exception:
+            del plans[name]
+            raise
+        return plan
+
+    def _compile_type(self, type_name):
+        ''' return the (encoder, decoder) pair for an abi type string such as name[] or asset? '''
+        if type_name.endswith('?'):
+            return self._compile_optional(*self._compile_type(type_name[:-1]))
+        if type_name.endswith('[]'):
+            return self._compile_array(*self._compile_type(type_name[:-2]))
+        type_name = self.resolve_type(type_name)
+        if type_name in _ABI_BUILTIN_CODECS:
+            return _ABI_BUILTIN_CODECS[type_name]
+        if self.get_struct(type_name) is not None:
+            return self._compile_struct(type_name)
+        if type_name in _ABI_OBJECT_TYPES:
+            return self._compile_object(_ABI_OBJECT_TYPES[type_name])
+        return self._compile_unknown(type_name)
+
+    def _compile_optional(self, encoder, decoder):
+        def encode(buf, v):
+            if v is None:
+                buf.push(0)
             else:
-                field_type = type(params[field])
-                self._encode_buffer(field_type(data[field]), buf)
-    
+                buf.push(1)
+                encoder(buf, v)
+        def decode(buf):
+            if buf.get() == 0:
+                return None
+            return decoder(buf)
+        return encode, decode
+
+    def _compile_array(self, encoder, decoder):
+        def encode(buf, v):
+            buf.pushVarUint32(len(v))
+            for item in v:
+                encoder(buf, item)
+        def decode(buf):
+            return [decoder(buf) for _ in range(buf.getVarUint32())]
+        return encode, decode
+
+    def _compile_struct(self, name):
+        # resolved lazily so recursive and not yet compiled structs work
+        def encode(buf, v):
+            # optional struct fields never get here with None, see _compile_optional
+            if v is None:
+                raise EOSSerializationError("Expected {} struct".format(name))
+            self._encode_plan(self.get_plan(name), v, buf)
+        def decode(buf):
+            return self._decode_plan(self.get_plan(name), buf)
+        return encode, decode
+
+    def _compile_object(self, cls):
+        def encode(buf, v):
+            cls(v).encode(buf)
+        def decode(buf):
+            raise EOSBufferInvalidType("Cannot decode type: {}".format(cls))
+        return encode, decode
+
+    def _compile_unknown(self, type_name):
+        # only fail when the field is actually used so compile() works on any abi
+        def codec(buf, v=None):
+            raise EOSUnknownObj("{} is not a known abi type".format(type_name))
+        return codec, codec
+
+    def _encode_plan(self, plan, data, buf):
+        for field, encoder, decoder, optional in plan:
+            try:
+                v = data[field]
+            except KeyError:
+                if not optional:
+                    raise EOSAbiProcessingError("missing field {}".format(field))
+                v = None
+            encoder(buf, v)
+
+    def _decode_plan(self, plan, buf):
+        data = OrderedDict()
+        for field, encoder, decoder, optional in plan:
+            data[field] = decoder(buf)
+        return data
+
+    def encode_struct(self, name, data, buf):
+        ''' write data as struct name into buf, raises EOSSerializationError when data does not fit the abi '''
+        try:
+            self._encode_plan(self.get_plan(name), data, buf)
+        except EOSSerializationError:
+            raise
+        except _VALUE_ERRORS as exc:
+            raise EOSSerializationError({"message": "cannot serialize {}: {}".format(name, exc)}) from exc
+
+    def decode_struct(self, name, buf):
+        ''' read struct name from buf '''
+        return self._decode_plan(self.get_plan(name), buf)
+
     def json_to_bin(self, name, data):
-        # act = self.get_action(name)
-        params = self.get_action_parameters(name)
+        ''' serialize data as struct name and return it as hex '''
         buf = EOSBuffer()
-        self._loop_type(params, data, buf)
+        self.encode_struct(name, data, buf)
         return buf.hex()
 
+    def bin_to_json(self, name, data):
+        ''' deserialize the hex string or bytes data as struct name '''
+        if isinstance(data, str):
+            data = bytearray.fromhex(data)
+        return self.decode_struct(name, EOSBuffer(data, zero_copy=True))
+
 
 
 class ChainInfo(BaseObject) :
@@ -646,9 +844,8 @@ class Transaction(BaseObject) :
         ''' '''
         buf = EOSBuffer()
         exp_ts = (self.expiration - dt.datetime(1970, 1, 1, tzinfo=self.expiration.tzinfo)).total_seconds()
-        self._encode_buffer(UInt32(exp_ts), buf)
-        self._encode_buffer(UInt16(self.ref_block_num & 0xffff), buf)
-        self._encode_buffer(UInt32(self.ref_block_prefix), buf)
+        # expiration, ref_block_num and ref_block_prefix are packed in one go
+        buf.push_many("<IHI", (int(exp_ts), self.ref_block_num & 0xffff, self.ref_block_prefix))
         self._encode_buffer(VarUInt(self.net_usage_words), buf)
         self._encode_buffer(Byte(self.max_cpu_usage_ms), buf)
         self._encode_buffer(VarUInt(self.delay_sec), buf)
@@ -709,19 +906,13 @@ class PackedTransaction:
             # get data length
             hex_data_len = buf.decode(VarUInt())
             # get abi information
-            contract_abi = self._cleos.get_abi(acct_name)
-            abi = Abi(contract_abi["abi"])
+            abi = self._cleos.get_cached_abi(acct_name)
             abi_act = abi.get_action(action_name)
             # temp check need to handle this better
             if abi_act.type != action_name:
                 raise EOSAbiProcessingError("Error processing the {} action".format(action_name)) 
-            abi_struct = abi.get_action_parameters(action_name)
-            data = OrderedDict()
-            # save data for hex_data
-            for a in abi_struct:
-                act_data = buf.decode(abi_struct[a])
-                data[a] = act_data
-                
+            data = abi.decode_struct(abi_act.type, buf)
+
             act = OrderedDict({
                 'account': acct_name,
                 'name': action_name,
@@ -781,7 +972,7 @@ class PackedTransaction:
         # only unpack once
         if not self._is_unpacked:    
             # decode the header and get the rest of the trx back
-            trx_buf = EOSBuffer(bytearray.fromhex(self._packed_trx))
+            trx_buf = EOSBuffer(bytearray.fromhex(self._packed_trx), zero_copy=True)
             self._decode_header(trx_buf)
             # process list of context free actions
             context_actions = self.decode_context_actions(trx_buf)
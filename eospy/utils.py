@@ -1,11 +1,13 @@
 from binascii import hexlify, unhexlify
 import struct
 import hashlib
+from functools import lru_cache
 import datetime as dt
 import time
 import pytz
 import six
 from .exceptions import InvalidKeyFile
+from .b58 import b58encode, b58decode
 
 def parse_key_file(filename, first_key=True):
     keys=[]
@@ -76,6 +78,13 @@ def char_subtraction(a, b, add) :
         ans = '0' + ans
     return int(ans)
 
+# symbol tables for the base32 name encoding, '.' is 0
+_NAME_CHARMAP = '.12345abcdefghijklmnopqrstuvwxyz'
+_CHAR_SYMBOLS = dict((c, i) for i, c in enumerate(_NAME_CHARMAP) if c != '.')
+_NAME_SYMBOLS = dict((c, i) for i, c in enumerate(_NAME_CHARMAP))
+# hot account/action/permission names are memoized
+NAME_CACHE_SIZE = 4096
+
 #static constexpr uint64_t char_to_symbol( char c ) {
 #    if( c >= 'a' && c <= 'z' )
 #       return (c - 'a') + 6;
@@ -85,11 +94,7 @@ def char_subtraction(a, b, add) :
 #}
 def char_to_symbol(c) :
     ''' '''
-    if c >= 'a' and c <= 'z' :
-        return char_subtraction(c, 'a', 6)
-    if c >= '1' and c <= '5' :
-        return char_subtraction(c, '1', 1)
-    return 0
+    return _CHAR_SYMBOLS.get(c, 0)
     
 #// Each char of the string is encoded into 5-bit chunk and left-shifted
 #// to its 5-bit slot starting with the highest slot for the first char.
@@ -113,30 +118,51 @@ def char_to_symbol(c) :
 #    name |= char_to_symbol(str[12]) & 0x0F;
 #    return name;
 #    }
+@lru_cache(maxsize=NAME_CACHE_SIZE)
 def string_to_name(s) :
     ''' '''
-    i = 0
+    # reject what nodeos rejects instead of encoding a different name
+    if len(s) > 13 :
+        raise ValueError('name {} is longer than 13 characters'.format(s))
+    if s.endswith('.') :
+        raise ValueError('name {} is not normalized, it cannot end with a dot'.format(s))
+    symbols = _NAME_SYMBOLS
     name = 0
-    while i < len(s) :
-        #sym = char_to_symbol(s[i])
-        name += (char_to_symbol(s[i]) & 0x1F) << (64-5 * (i + 1))
-        i += 1
-    if i > 12 :
-        name |= char_to_symbol(s[11]) & 0x0F
+    shift = 59
+    try :
+        for c in s[:12] :
+            name |= symbols[c] << shift
+            shift -= 5
+        if len(s) == 13 :
+            last = symbols[s[12]]
+            if last > 0x0F :
+                raise ValueError('the 13th character of name {} must be one of .12345abcdefghij'.format(s))
+            name |= last
+    except KeyError :
+        raise ValueError('name {} may only contain the characters .12345abcdefghijklmnopqrstuvwxyz'.format(s))
     return name
 
-
+@lru_cache(maxsize=NAME_CACHE_SIZE)
 def name_to_string(n) :
     ''' '''
-    charmap = '.12345abcdefghijklmnopqrstuvwxyz'
-    name = ['.'] * 13
-    i = 0
-    while i <= 12:
-        c = charmap[n & (0x0F if i == 0 else 0x1F)]
-        name[12-i] = c
-        n >>= 4 if i == 0 else 5
-        i += 1
-    return ''.join(name).rstrip('.')
+    charmap = _NAME_CHARMAP
+    # lowest 4 bits hold the 13th char, then 5 bits per char from the 12th backwards
+    name = [charmap[n & 0x0F]]
+    n >>= 4
+    for _ in range(12) :
+        name.append(charmap[n & 0x1F])
+        n >>= 5
+    return ''.join(reversed(name)).rstrip('.')
+
+def strings_to_names(strings) :
+    ''' encode a sequence of name strings to a list of uint64 '''
+    encode = string_to_name
+    return [encode(s) for s in strings]
+
+def names_to_strings(names) :
+    ''' decode a sequence of uint64 names to a list of strings '''
+    decode = name_to_string
+    return [decode(n) for n in names]
 
 # if six.PY3 :
 #     def _byte(b) :
@@ -164,42 +190,16 @@ base58Chars = b"123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
 publicKeyDataSize = 33
 signatureDataSize = 65
 
+# recently seen public keys are memoized, both directions
+PUBLIC_KEY_CACHE_SIZE = 1024
+
 def base58ToBinary(s):
-    base58_text = bytes(s, "utf8")
-    n = 0
-    leading_zeroes_count = 0
-    for b in base58_text:
-        n = n * 58 + base58Chars.find(b)
-        if n == 0:
-            leading_zeroes_count += 1
-    res = bytearray()
-    while n >= 256:
-        div, mod = divmod(n, 256)
-        res.insert(0, mod)
-        n = div
-    else:
-        res.insert(0, n)
-    return (bytearray(1) * leading_zeroes_count + res)
+    return bytearray(b58decode(s))
 
 def binaryToBase58(data):
-    if isinstance(data, bytearray):
-        byteseq = data
-    else:
-        byteseq = unhexlify(bytes(data, "utf8"))
-    n = 0
-    leading_zeroes_count = 0
-    for c in byteseq:
-        n = n * 256 + c
-        if n == 0:
-            leading_zeroes_count += 1
-    res = bytearray()
-    while n >= 58:
-        div, mod = divmod(n, 58)
-        res.insert(0, base58Chars[mod])
-        n = div
-    else:
-        res.insert(0, base58Chars[n])
-    return (base58Chars[0:1] * leading_zeroes_count + res).decode("ascii")
+    if isinstance(data, str):
+        data = unhexlify(bytes(data, "utf8"))
+    return b58encode(data)
 
 def digestSuffixRipemd160(data, suffix):
     d = bytearray(data)
@@ -211,11 +211,11 @@ def digestSuffixRipemd160(data, suffix):
 
 def stringToKey(s, type, size, suffix):
     whole = base58ToBinary(s)
-    digest = digestSuffixRipemd160(whole[:publicKeyDataSize], suffix)
+    digest = digestSuffixRipemd160(whole[:size], suffix)
     if (digest[0] != whole[size + 0] or digest[1] != whole[size + 1]
         or digest[2] != whole[size + 2] or digest[3] != whole[size + 3]):
         raise Exception({"message": "checksum doesn't match"})
-    return (type, whole[:publicKeyDataSize])
+    return (type, whole[:size])
 
 def keyToString(key, suffix, prefix, eos=True):
     if eos:
@@ -230,21 +230,32 @@ def keyToString(key, suffix, prefix, eos=True):
 def stringToPublicKey(s):
     if not isinstance(s, str):
         raise Exception({"message": "expected string containing public key"})
+    return _stringToPublicKey(s)
+
+@lru_cache(maxsize=PUBLIC_KEY_CACHE_SIZE)
+def _stringToPublicKey(s):
     if (s[:3] == "EOS"):
         whole = base58ToBinary(s[3:])
         data = whole[:publicKeyDataSize]
         digest = ripemd160Data(data)
         if (digest[0] != whole[publicKeyDataSize] or digest[1] != whole[34] or digest[2] != whole[35] or digest[3] != whole[36]):
             raise Exception({"message": "checksum doesn't match"})
-        return (0, data)
+        return (0, bytes(data))
     elif (s[:7] == "PUB_K1_"):
-        return stringToKey(s[7:], 0, publicKeyDataSize, "K1")
+        key_type, data = stringToKey(s[7:], 0, publicKeyDataSize, "K1")
+        return (key_type, bytes(data))
     elif (s[:7] == "PUB_R1_"):
-        return stringToKey(s[7:], 1, publicKeyDataSize, "R1")
+        key_type, data = stringToKey(s[7:], 1, publicKeyDataSize, "R1")
+        return (key_type, bytes(data))
     else:
         raise Exception({"message": "unrecognized public key format"})
     
 def publicKeyToString(key, eos=True):
+    return _publicKeyToString(key[0], bytes(key[1]), eos)
+
+@lru_cache(maxsize=PUBLIC_KEY_CACHE_SIZE)
+def _publicKeyToString(key_type, data, eos):
+    key = (key_type, data)
     if (key[0] == 0 and len(key[1]) == publicKeyDataSize):
         if eos:
             return keyToString(key, "K1", "EOS", eos)
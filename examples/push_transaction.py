@@ -25,8 +25,8 @@ payload = {
         "permission": "owner",
     }],
 }
-#Converting payload to binary
-data = ce.abi_json_to_bin(payload['account'], payload['name'], arguments)
+#Converting payload to binary, serialized locally from the cached contract abi
+data = ce.json_to_bin(payload['account'], payload['name'], arguments)
 #Inserting payload binary form as "data" field in original payload
 payload['data'] = data['binargs']
 #final transaction formed
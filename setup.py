@@ -24,13 +24,16 @@ setup(
     test_suite='nose.collector',
     install_requires=[
         'requests',
-        'base58>=1.0.3',
         'ecdsa>=0.13.3,<0.14',
         'colander',
         'pytz',
         'six',
         'pyyaml',
     ],
+    extras_require={
+        # libsecp256k1 signing backend, see eospy.keys.set_backend
+        'coincurve': ['coincurve'],
+    },
     entry_points={
         'console_scripts': [
             'validate_chain = eospy.command_line:validate_chain',
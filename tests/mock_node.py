@@ -0,0 +1,112 @@
+'''
+Minimal local nodeos stand-in used by the offline tests.
+
+MockNode serves POST/GET /v1/<api>/<method> from a dict of handlers on a
+random local port and records every request and client connection it sees.
+MockNodes runs several of them on their own ports for the multi-endpoint tests.
+'''
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class _Handler(BaseHTTPRequestHandler) :
+    protocol_version = 'HTTP/1.1'
+    # headers and body go out in separate writes, keep-alive requests would stall on delayed acks
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args) :
+        pass
+
+    def _reply(self) :
+        node = self.server.node
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        try :
+            payload = json.loads(body.decode('utf-8')) if body else None
+        except ValueError :
+            payload = None
+        path = self.path.split('?')[0]
+        if node.delay :
+            time.sleep(node.delay)
+        with node.lock :
+            node.requests.append((path, payload))
+            node.connections.add(self.client_address)
+        handler = node.handlers.get(path)
+        if handler is None :
+            status, result = 404, {'code': 404, 'message': 'Not Found', 'error': {'what': path}}
+        else :
+            status, result = handler(payload)
+        data = json.dumps(result).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = _reply
+    do_POST = _reply
+
+class MockNode :
+    def __init__(self, handlers=None) :
+        self.handlers = dict(handlers or {})
+        self.requests = []
+        self.connections = set()
+        # seconds to wait before answering
+        self.delay = 0
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.node = self
+        # clients that give up on a slow reply (hedged or timed out requests) are not an error
+        self._server.handle_error = lambda request, client_address : None
+        self._port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) :
+        return 'http://127.0.0.1:{}'.format(self._port)
+
+    def route(self, path, result, status=200) :
+        ''' serve a fixed result (or a callable taking the request json) on path '''
+        if callable(result) :
+            self.handlers[path] = lambda payload : (status, result(payload))
+        else :
+            self.handlers[path] = lambda payload : (status, result)
+
+    def calls(self, path) :
+        return [payload for p, payload in self.requests if p == path]
+
+    def __enter__(self) :
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) :
+        self.stop()
+
+    def stop(self) :
+        ''' shut the server down, later connections to url are refused '''
+        if self._server is None :
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+
+class MockNodes(list) :
+    ''' count MockNodes sharing the same handlers '''
+    def __init__(self, count, handlers=None) :
+        super().__init__(MockNode(handlers) for _ in range(count))
+        self.urls = [node.url for node in self]
+
+    def route(self, path, result, status=200) :
+        for node in self :
+            node.route(path, result, status)
+
+    def __enter__(self) :
+        for node in self :
+            node.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) :
+        for node in self :
+            node.stop()
@@ -161,4 +161,159 @@ class TestSerialize:
         print(json.dumps(trx_obj))
         
         
-        
\ No newline at end of file
+        
+    def test_abi_indexes(self):
+        import os
+        abi_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'examples', 'eosio.system.abi')
+        with open(abi_path) as rf:
+            abi_json = json.load(rf)
+        abi_json['types'] = [{'new_type_name': 'account_name', 'type': 'name'}]
+        abi_json['structs'].append({'name': 'aliased', 'base': '', 'fields': [{'name': 'who', 'type': 'account_name'}]})
+        abi = Abi(abi_json)
+        assert abi.get_action('voteproducer').type == 'voteproducer'
+        assert abi.get_table('producers').type == 'producer_info'
+        assert abi.get_struct('unknown') is None
+        assert abi.resolve_type('account_name') == 'name'
+        assert abi.json_to_bin('aliased', {'who': 'eosio'}) == '0000000000ea3055'
+
+    def test_abi_compiled_codec(self):
+        import os
+        abi_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'examples', 'eosio.system.abi')
+        with open(abi_path) as rf:
+            abi = Abi(json.load(rf)).compile()
+        auth = {"threshold": 1, "keys": [{"key": "EOS5BiYrPwXwFmrjLQ3ZUa3BX9crdomJNfYdu6uC863XAXrHNyWbo", "weight": 1}],
+                "accounts": [{"permission": {"actor": "eosio", "permission": "active"}, "weight": 1}], "waits": []}
+        data = {"creator": "eosio", "name": "testtesttest", "owner": auth, "active": auth}
+        hexs = abi.json_to_bin("newaccount", data)
+        assert json.loads(json.dumps(abi.bin_to_json("newaccount", hexs))) == data
+        vote = {"voter": "dspnewyorkio", "proxy": "", "producers": ["bpa1", "bpa2"]}
+        assert "401dbcd473352b4e0000000000000000020000000000104c3d0000000000204c3d" == abi.json_to_bin("voteproducer", vote)
+        code = {"account": "eosio", "vmtype": 0, "vmversion": 0, "code": "0061736d"}
+        assert "0000000000ea30550000040061736d" == abi.json_to_bin("setcode", code)
+        assert dict(abi.bin_to_json("setcode", "0000000000ea30550000040061736d")) == code
+
+    def test_abi_small_ints_and_bool(self):
+        import os
+        from eospy.exceptions import EOSSerializationError
+        abi_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'examples', 'eosio.system.abi')
+        with open(abi_path) as rf:
+            abi_json = json.load(rf)
+        abi_json['structs'].append({'name': 'small', 'base': '', 'fields': [
+            {'name': 'a', 'type': 'int8'}, {'name': 'b', 'type': 'uint8'}, {'name': 'c', 'type': 'bool'}]})
+        abi = Abi(abi_json).compile()
+        data = {'a': -1, 'b': 255, 'c': True}
+        assert abi.json_to_bin('small', data) == 'ffff01'
+        assert dict(abi.bin_to_json('small', 'ffff01')) == data
+        assert dict(abi.bin_to_json('small', '80000000')) == {'a': -128, 'b': 0, 'c': False}
+        assert abi.bin_to_json('small', '800000')['c'] is False
+        for bad in [{'a': 128}, {'b': -1}, {'c': 1}]:
+            try:
+                abi.json_to_bin('small', dict(data, **bad))
+                assert False, '{} must not serialize'.format(bad)
+            except EOSSerializationError:
+                pass
+
+    def test_abi_none_struct_field(self):
+        import os
+        from eospy.exceptions import EOSSerializationError
+        abi_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'examples', 'eosio.system.abi')
+        with open(abi_path) as rf:
+            abi_json = json.load(rf)
+        abi_json['structs'].append({'name': 'maybe', 'base': '', 'fields': [{'name': 'auth', 'type': 'permission_level?'}]})
+        abi = Abi(abi_json).compile()
+        auth = {"threshold": 1, "keys": [], "accounts": [], "waits": []}
+        try:
+            abi.json_to_bin('newaccount', {"creator": "eosio", "name": "testtesttest", "owner": None, "active": auth})
+            assert False, 'a required struct field must not serialize from None'
+        except EOSSerializationError:
+            pass
+        # only optional fields take None
+        assert abi.json_to_bin('maybe', {'auth': None}) == '00'
+        assert abi.json_to_bin('maybe', {}) == '00'
+
+    def test_eosbuffer_dispatch(self):
+        from eospy.types import EOSBuffer, Name, AccountName, UInt16
+
+        class Weight(int):
+            pass
+
+        class Score(Weight):
+            pass
+
+        buf = EOSBuffer()
+        buf.encode(AccountName('eosio'))
+        buf.encode('eosio')
+        EOSBuffer.register_encoder(Weight, lambda b, v: b.pushUint16(v))
+        EOSBuffer.register_decoder(Weight, lambda b, o: Weight(b.getUint16()))
+        buf.encode(Score(7))
+        assert buf.hex() == '0000000000ea305505656f73696f0700'
+        buf.restartRead()
+        assert [buf.decode(Name()), buf.decode(str()), buf.decode(Score())] == ['eosio', 'eosio', 7]
+
+    def test_zero_copy_reads(self):
+        buf = SerialBuffer()
+        buf.pushUint16(513)
+        buf.pushInt64(-5)
+        buf.pushString("eospy")
+        buf.pushChecksum256("ab" * 32)
+        buf.pushPublicKey("EOS5BiYrPwXwFmrjLQ3ZUa3BX9crdomJNfYdu6uC863XAXrHNyWbo")
+        data = bytes(buf.getByteArray())
+        rd = SerialBuffer(data, zero_copy=True)
+        assert rd.getUint16() == 513
+        assert rd.getInt64() == -5
+        blob = rd.getBytes()
+        assert isinstance(blob, memoryview) and blob.obj is data
+        assert str(blob, "utf-8") == "eospy"
+        assert rd.getChecksum256() == "ab" * 32
+        assert rd.getPublicKey() == "EOS5BiYrPwXwFmrjLQ3ZUa3BX9crdomJNfYdu6uC863XAXrHNyWbo"
+        assert not rd.hasReadData()
+        try:
+            rd.getUint32()
+            assert False, "read past end of buffer"
+        except Exception as ex:
+            assert "Read past end" in str(ex)
+
+    def test_push_many(self):
+        buf = SerialBuffer()
+        buf.pushUint32(1577836800)
+        buf.pushUint16(0xbeef)
+        buf.pushUint32(123456789)
+        batched = SerialBuffer()
+        batched.push_many("<IHI", (1577836800, 0xbeef, 123456789))
+        assert batched.hex() == buf.hex() == "00e10b5eefbe15cd5b07"
+
+    def test_name_codec(self):
+        from eospy.utils import string_to_name, name_to_string, strings_to_names, names_to_strings
+        assert string_to_name("eosio") == 6138663577826885632
+        assert string_to_name("eosio.token") == 6138663591592764928
+        assert string_to_name("") == 0
+        assert name_to_string(string_to_name("abcdefghijkl5")) == "abcdefghijkl5"
+        assert name_to_string(0xffffffffffffffff) == "zzzzzzzzzzzzj"
+        names = ["eosio", "eosio.token", "bpa1", "eosio"]
+        assert names_to_strings(strings_to_names(names)) == names
+        buf = SerialBuffer()
+        buf.pushName("abcdefghijkl5")
+        assert buf.getName() == "abcdefghijkl5"
+        for bad in ["Alice", "eosio.tok@n", "abcdefghijklk", "eosio.", "abcdefghijklmn"]:
+            try:
+                string_to_name(bad)
+                assert False, "{} is not a valid name".format(bad)
+            except ValueError:
+                pass
+
+    def test_base58(self):
+        from eospy.b58 import b58encode, b58decode
+        from eospy.utils import stringToPublicKey, publicKeyToString
+        assert b58encode(b"\0\0hello world") == "11StV1DL6CwTryKyV"
+        assert b58decode("11StV1DL6CwTryKyV") == b"\0\0hello world"
+        assert b58encode(b"") == "" and b58decode("") == b""
+        try:
+            b58decode("0OIl")
+            assert False, "invalid base58 accepted"
+        except ValueError:
+            pass
+        pub = "EOS6MRyAjQq8ud7hVNYcfnVPJqcVpscN5So8BhtHuGYqET5GDW5CV"
+        key = stringToPublicKey(pub)
+        assert publicKeyToString(key) == pub
+        assert publicKeyToString((key[0], bytearray(key[1])), False) == "PUB_K1_6MRyAjQq8ud7hVNYcfnVPJqcVpscN5So8BhtHuGYqET5BoDq63"
+        assert stringToPublicKey(convertLegacyPublicKey(pub)) == key
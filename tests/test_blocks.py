@@ -0,0 +1,83 @@
+import asyncio
+import random
+import threading
+import time
+from mock_node import MockNode, MockNodes
+from eospy.cleos import Cleos
+from eospy.exceptions import EOSAPIException
+
+CHAIN_ERROR = {'code': 500, 'message': 'Internal Service Error',
+               'error': {'code': 3100002, 'name': 'unknown_block_exception', 'what': 'Unknown block'}}
+
+def block_server(nodes, flaky=7) :
+    ''' get_block with random latency, every flaky-th block fails its first request '''
+    lock = threading.Lock()
+    state = {'inflight': 0, 'max_inflight': 0, 'failed': set()}
+
+    def make(node) :
+        def handler(payload) :
+            num = payload['block_num_or_id']
+            with lock :
+                state['inflight'] += 1
+                state['max_inflight'] = max(state['max_inflight'], state['inflight'])
+                fail = num % flaky == 0 and num not in state['failed']
+                if fail :
+                    state['failed'].add(num)
+            time.sleep(random.random() * 0.005)
+            with lock :
+                state['inflight'] -= 1
+            if fail :
+                return 503, {'message': 'Service Unavailable'}
+            return 200, {'block_num': num, 'id': '{:064x}'.format(num)}
+        node.handlers['/v1/chain/get_block'] = handler
+
+    for node in nodes :
+        make(node)
+    return state
+
+def test_fetch_blocks_in_order() :
+    async def run(ce) :
+        async with ce :
+            blocks = []
+            async for block in ce.fetch_blocks(1, 120, concurrency=6, window=10, retry_delay=0.001) :
+                # nothing is requested past the reorder window
+                assert max(c['block_num_or_id'] for c in node.calls('/v1/chain/get_block')) <= block['block_num'] + 10
+                blocks.append(block['block_num'])
+            assert blocks == list(range(1, 121))
+
+    with MockNode() as node :
+        state = block_server([node])
+        asyncio.run(run(Cleos(url=node.url)))
+        assert len(state['failed']) == 17
+        assert len(node.calls('/v1/chain/get_block')) == 120 + 17
+        assert 1 < state['max_inflight'] <= 6
+
+def test_fetch_blocks_across_endpoints() :
+    async def run(ce) :
+        async with ce :
+            return [block['block_num'] async for block in ce.fetch_blocks(10, 89, concurrency=8, retry_delay=0.001)]
+
+    with MockNodes(3) as nodes :
+        block_server(nodes, flaky=5)
+        nodes[0].stop()
+        assert asyncio.run(run(Cleos(url=nodes.urls))) == list(range(10, 90))
+        # concurrent requests are spread over the live nodes
+        assert all(len(node.calls('/v1/chain/get_block')) > 10 for node in nodes[1:])
+
+def test_fetch_blocks_gives_up() :
+    async def run(ce) :
+        async with ce :
+            blocks = []
+            try :
+                async for block in ce.fetch_blocks(1, 20, concurrency=4, retries=2, retry_delay=0.001) :
+                    blocks.append(block['block_num'])
+                assert False, 'the missing block must be raised'
+            except EOSAPIException :
+                pass
+            return blocks
+
+    with MockNode() as node :
+        node.handlers['/v1/chain/get_block'] = lambda payload : ((500, CHAIN_ERROR) if payload['block_num_or_id'] == 5
+                                                                 else (200, {'block_num': payload['block_num_or_id']}))
+        assert asyncio.run(run(Cleos(url=node.url))) == [1, 2, 3, 4]
+        assert len([c for c in node.calls('/v1/chain/get_block') if c['block_num_or_id'] == 5]) == 3
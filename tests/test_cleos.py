@@ -94,3 +94,163 @@ class TestCleos :
         self.ce.get_producers()
 
     
+
+#####
+# offline tests against a local mock node
+#####
+from mock_node import MockNode
+from eospy.keys import EOSKey
+from eospy.exceptions import EOSAbiProcessingError
+
+WIF = '5KQwrPbwdL6PhXujxW37FSSQZ1JiwsST4cqQzDeyXtP79zkvFD3'
+CHAIN_INFO = {'chain_id': 'aca376f206b8fc25a6ed44dbdc66547c36c6c33e3a119ffbeaef943642f0e906',
+              'head_block_num': 120, 'last_irreversible_block_num': 100}
+TRANSFER = {'account': 'eosio.token', 'name': 'transfer',
+            'authorization': [{'actor': 'eosio', 'permission': 'active'}],
+            'data': '0000000000ea3055408608850c110e3d102700000000000004454f53000000000f454f5320746f20746865206d6f6f6e'}
+
+def mock_chain(node) :
+    node.route('/v1/chain/get_info', CHAIN_INFO)
+    node.route('/v1/chain/get_block', lambda payload : {'block_num': payload['block_num_or_id'], 'ref_block_prefix': 1234})
+
+def test_push_transaction_reuses_tapos() :
+    with MockNode() as node :
+        mock_chain(node)
+        with eospy.cleos.Cleos(url=node.url) as ce :
+            key = EOSKey(WIF)
+            for _ in range(3) :
+                ce.push_transaction({'actions': [TRANSFER]}, key, broadcast=False)
+        assert len(node.calls('/v1/chain/get_info')) == 1
+        assert len(node.calls('/v1/chain/get_block')) == 1
+
+def test_push_transaction_tapos_disabled() :
+    with MockNode() as node :
+        mock_chain(node)
+        with eospy.cleos.Cleos(url=node.url, tapos_refresh=0) as ce :
+            key = EOSKey(WIF)
+            for _ in range(2) :
+                ce.push_transaction({'actions': [TRANSFER]}, key, broadcast=False)
+        assert len(node.calls('/v1/chain/get_info')) == 2
+
+def test_async_push_transaction_key_list() :
+    import asyncio, json
+    from eospy.keys import get_key
+
+    async def run(ce) :
+        for _ in range(2) :
+            trx = json.loads(await ce.async_push_transaction({'actions': [TRANSFER]}, [WIF, EOSKey(WIF)], broadcast=False))
+            assert len(trx['signatures']) == 2 and trx['signatures'][0] == trx['signatures'][1]
+
+    with MockNode() as node :
+        mock_chain(node)
+        with eospy.cleos.Cleos(url=node.url) as ce :
+            misses = get_key.cache_info().misses
+            asyncio.run(run(ce))
+            assert get_key.cache_info().misses <= misses + 1
+
+def load_abi(name) :
+    import json, os
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'examples', name)
+    with open(path) as rf :
+        return json.load(rf)
+
+TRANSFER_ARGS = {'from': 'eosio', 'to': 'bob123451234', 'quantity': '1.0000 EOS', 'memo': 'EOS to the moon'}
+
+def test_json_to_bin_local() :
+    with MockNode() as node :
+        mock_token_abi(node)
+        with eospy.cleos.Cleos(url=node.url) as ce :
+            for _ in range(3) :
+                assert ce.json_to_bin('eosio.token', 'transfer', TRANSFER_ARGS)['binargs'] == TRANSFER['data']
+        assert len(node.calls('/v1/chain/get_abi')) == 1
+        assert node.calls('/v1/chain/abi_json_to_bin') == []
+
+def test_json_to_bin_fallback() :
+    with MockNode() as node :
+        node.route('/v1/chain/get_abi', {'account_name': 'eosio', 'abi': load_abi('eosio.system.abi')})
+        node.route('/v1/chain/get_raw_abi', {'account_name': 'eosio', 'code_hash': '22' * 32, 'abi_hash': '11' * 32, 'abi': ''})
+        node.route('/v1/chain/abi_json_to_bin', {'binargs': '00'})
+        args = {'account': 'eosio', 'vmtype': 0, 'vmversion': 0}
+        with eospy.cleos.Cleos(url=node.url) as ce :
+            # the missing code field is left for the node to report
+            assert ce.json_to_bin('eosio', 'setcode', args)['binargs'] == '00'
+            assert ce.json_to_bin('eosio.token', 'transfer', TRANSFER_ARGS, local=False)['binargs'] == '00'
+            try :
+                ce.json_to_bin('eosio', 'setcode', args, local=True)
+                assert False, 'local=True must not fall back to the node'
+            except EOSAbiProcessingError :
+                pass
+        assert len(node.calls('/v1/chain/abi_json_to_bin')) == 2
+
+def test_json_to_bin_invalid_values() :
+    from eospy.exceptions import EOSSerializationError
+    with MockNode() as node :
+        mock_token_abi(node)
+        node.route('/v1/chain/abi_json_to_bin', {'binargs': '00'})
+        with eospy.cleos.Cleos(url=node.url) as ce :
+            # an amount without a decimal point has precision 0
+            binargs = ce.json_to_bin('eosio.token', 'transfer', dict(TRANSFER_ARGS, quantity='1 EOS'))['binargs']
+            assert binargs[32:64] == '0100000000000000' + '00454f5300000000'
+            assert node.calls('/v1/chain/abi_json_to_bin') == []
+            # invalid names, out of range numbers and malformed assets go to the node instead of being
+            # encoded as something else
+            bad = [{'from': 'Alice'}, {'to': 'eosio.tok@n'}, {'to': 'aaaaaaaaaaaak'}, {'quantity': '1.0000'},
+                   {'quantity': '99999999999999999999.0000 EOS'}]
+            for fields in bad :
+                assert ce.json_to_bin('eosio.token', 'transfer', dict(TRANSFER_ARGS, **fields))['binargs'] == '00'
+                try :
+                    ce.json_to_bin('eosio.token', 'transfer', dict(TRANSFER_ARGS, **fields), local=True)
+                    assert False, '{} must not serialize'.format(fields)
+                except EOSSerializationError :
+                    pass
+        assert len(node.calls('/v1/chain/abi_json_to_bin')) == len(bad)
+
+def mock_token_abi(node, abi_hash='11' * 32) :
+    def raw_abi(payload) :
+        res = {'account_name': 'eosio.token', 'code_hash': '22' * 32, 'abi_hash': abi_hash}
+        # like nodeos, the abi is only sent when the caller's abi_hash is out of date
+        if payload.get('abi_hash') != abi_hash :
+            res['abi'] = 'AAAA'
+        return res
+    node.route('/v1/chain/get_abi', {'account_name': 'eosio.token', 'abi': load_abi('eosio.token.abi')})
+    node.route('/v1/chain/get_raw_abi', raw_abi)
+
+def test_packed_transaction_abi_cache() :
+    from eospy.types import Transaction, PackedTransaction
+    with MockNode() as node :
+        mock_chain(node)
+        mock_token_abi(node)
+        with eospy.cleos.Cleos(url=node.url) as ce :
+            chain_info, lib_info = ce.get_tapos_info()
+            trx = Transaction({'actions': [dict(TRANSFER) for _ in range(10)]}, chain_info, lib_info)
+            decoded = PackedTransaction(trx.encode().hex(), ce).get_transaction()
+            assert [a['data'] for a in decoded['actions']] == [TRANSFER_ARGS] * 10
+            assert ce.abi_cache.stats()['misses'] == 1
+            assert ce.abi_cache.stats()['hits'] == 9
+        assert len(node.calls('/v1/chain/get_abi')) == 1
+
+def test_abi_cache_persistence_and_invalidation() :
+    import tempfile
+    with MockNode() as node :
+        mock_token_abi(node)
+        cache_dir = tempfile.mkdtemp()
+        with eospy.cleos.Cleos(url=node.url, abi_cache_dir=cache_dir) as ce :
+            ce.get_cached_abi('eosio.token')
+        # a new process starts warm and only checks the hashes
+        with eospy.cleos.Cleos(url=node.url, abi_cache_dir=cache_dir, abi_revalidate=0) as ce :
+            ce.get_cached_abi('eosio.token')
+            assert ce.abi_cache.stats()['revalidations'] == 1
+            assert len(node.calls('/v1/chain/get_abi')) == 1
+            # the hash check sends the cached abi_hash so the node skips the abi body
+            assert node.calls('/v1/chain/get_raw_abi')[-1] == {'account_name': 'eosio.token', 'abi_hash': '11' * 32}
+            # a new abi_hash forces a refetch
+            mock_token_abi(node, abi_hash='33' * 32)
+            ce.get_cached_abi('eosio.token')
+            assert ce.abi_cache.stats()['misses'] == 1
+        assert len(node.calls('/v1/chain/get_abi')) == 2
+        # entries from disk were never checked by this process, however long the interval
+        with eospy.cleos.Cleos(url=node.url, abi_cache_dir=cache_dir, abi_revalidate=10 ** 12) as ce :
+            raw_abi_calls = len(node.calls('/v1/chain/get_raw_abi'))
+            ce.get_cached_abi('eosio.token')
+            assert ce.abi_cache.stats()['revalidations'] == 1
+            assert len(node.calls('/v1/chain/get_raw_abi')) == raw_abi_calls + 1
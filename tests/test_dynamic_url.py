@@ -0,0 +1,45 @@
+import asyncio
+import requests
+from eospy.cleos import Cleos
+from eospy.dynamic_url import DynamicUrl
+from mock_node import MockNode
+
+INFO = {'chain_id': '00' * 32, 'head_block_num': 10, 'last_irreversible_block_num': 5}
+
+def test_derived_urls_share_session() :
+    dyn = DynamicUrl(url='http://127.0.0.1:1')
+    child = dyn.chain.get_info
+    assert child.session is dyn.session
+    assert child.create_url() == 'http://127.0.0.1:1/v1/chain/get_info'
+
+def test_external_session_not_closed() :
+    session = requests.Session()
+    ce = Cleos(url='http://127.0.0.1:1', session=session)
+    closed = []
+    session.close = lambda : closed.append(True)
+    ce.close()
+    assert closed == []
+
+def test_sync_calls_reuse_connection() :
+    with MockNode() as node :
+        node.route('/v1/chain/get_info', INFO)
+        with Cleos(url=node.url, pool_maxsize=2) as ce :
+            for _ in range(5) :
+                assert ce.get_info() == INFO
+        assert len(node.calls('/v1/chain/get_info')) == 5
+        assert len(node.connections) == 1
+
+def test_async_calls_share_session() :
+    with MockNode() as node :
+        node.route('/v1/chain/get_info', INFO)
+        node.route('/v1/chain/get_block', lambda payload : {'block_num': payload['block_num_or_id']})
+
+        async def run() :
+            async with Cleos(url=node.url, connector_limit_per_host=4) as ce :
+                blocks = await asyncio.gather(*[ce.async_get_block(i) for i in range(20)])
+                assert [b['block_num'] for b in blocks] == list(range(20))
+                assert await ce.async_get_info() == INFO
+                assert ce._dynurl._async_session is not None
+            assert ce._dynurl._async_session is None
+        asyncio.run(run())
+        assert len(node.connections) <= 4
@@ -0,0 +1,187 @@
+import asyncio
+import requests
+from mock_node import MockNodes
+from eospy.cleos import Cleos
+from eospy.endpoints import EndpointPool
+from eospy.exceptions import EOSAPIException
+
+INFO = {'chain_id': 'aca376f206b8fc25a6ed44dbdc66547c36c6c33e3a119ffbeaef943642f0e906', 'head_block_num': 120}
+CHAIN_ERROR = {'code': 500, 'message': 'Internal Service Error',
+               'error': {'code': 3100002, 'name': 'unknown_block_exception', 'what': 'Unknown block'}}
+
+def test_pool_ordering() :
+    pool = EndpointPool(['http://a', 'http://b/', 'http://c'], max_failures=2)
+    a, b, c = pool.endpoints
+    assert b.url == 'http://b'
+    pool.record_success(a, 0.2)
+    pool.record_success(b, 0.05)
+    # unmeasured endpoints are tried first
+    assert pool.ordered() == [c, b, a]
+    pool.record_success(c, 0.1)
+    assert pool.best() is b
+    # a node that failed before answering once goes last
+    d = EndpointPool(['http://a', 'http://d'])
+    d.record_failure(d.endpoints[0])
+    assert d.best().url == 'http://d'
+    pool.record_failure(b)
+    assert b.healthy() and b.error_rate > 0
+    pool.record_failure(b)
+    assert not b.healthy()
+    assert pool.ordered() == [c, a, b]
+    pool.record_success(b, 0.05)
+    assert b.healthy() and b.failures == 0
+
+def test_routes_to_fastest() :
+    with MockNodes(3) as nodes :
+        nodes.route('/v1/chain/get_info', INFO)
+        nodes[0].delay = nodes[1].delay = 0.05
+        with Cleos(url=nodes.urls) as ce :
+            for _ in range(10) :
+                assert ce.get_info() == INFO
+            stats = ce.endpoint_stats()
+        assert [len(node.calls('/v1/chain/get_info')) for node in nodes] == [1, 1, 8]
+        assert stats[2]['latency'] < stats[0]['latency']
+
+def test_failover() :
+    with MockNodes(3) as nodes :
+        nodes.route('/v1/chain/get_info', INFO)
+        nodes[0].stop()
+        nodes[1].route('/v1/chain/get_info', {'message': 'Bad Gateway'}, status=503)
+        with Cleos(url=nodes.urls) as ce :
+            for _ in range(3) :
+                assert ce.get_info() == INFO
+            stats = ce.endpoint_stats()
+        # the failed nodes are only retried once nothing better is left
+        assert [s['failures'] for s in stats] == [1, 1, 0]
+        assert stats[1]['error_rate'] > 0
+        assert [len(node.calls('/v1/chain/get_info')) for node in nodes[1:]] == [1, 3]
+
+def test_chain_errors_do_not_fail_over() :
+    with MockNodes(2) as nodes :
+        nodes.route('/v1/chain/get_block', CHAIN_ERROR, status=500)
+        with Cleos(url=nodes.urls) as ce :
+            try :
+                ce.get_block(-1)
+                assert False, 'the chain error must be raised'
+            except requests.exceptions.HTTPError :
+                pass
+            assert all(s['failures'] == 0 for s in ce.endpoint_stats())
+        assert sum(len(node.calls('/v1/chain/get_block')) for node in nodes) == 1
+
+def test_async_failover() :
+    async def run(ce) :
+        async with ce :
+            await check(ce)
+
+    async def check(ce) :
+        for _ in range(3) :
+            assert await ce.async_get_info() == INFO
+        try :
+            await ce.async_get_block(-1)
+            assert False, 'the chain error must be raised'
+        except EOSAPIException :
+            pass
+
+    with MockNodes(3) as nodes :
+        nodes.route('/v1/chain/get_info', INFO)
+        nodes.route('/v1/chain/get_block', CHAIN_ERROR, status=500)
+        nodes[0].stop()
+        nodes[1].route('/v1/chain/get_info', 'Bad Gateway', status=502)
+        ce = Cleos(url=nodes.urls)
+        asyncio.run(run(ce))
+        assert [len(node.calls('/v1/chain/get_info')) for node in nodes[1:]] == [1, 3]
+        assert [s['failures'] for s in ce.endpoint_stats()] == [1, 1, 0]
+
+def test_writes_only_fail_over_before_connecting() :
+    from eospy.dynamic_url import DynamicUrl
+    PUSHED = {'transaction_id': '00' * 32}
+
+    async def push(dyn, url) :
+        await dyn.async_open()
+        try :
+            return await dyn.async_post_url(url, json={})
+        finally :
+            await dyn.async_close()
+
+    with MockNodes(3) as nodes :
+        nodes.route('/v1/chain/push_transaction', PUSHED)
+        nodes[0].route('/v1/chain/push_transaction', {'message': 'Bad Gateway'}, status=502)
+        nodes[1].delay = 0.3
+        # the first node may have accepted the transaction behind the proxy error
+        for call in (lambda cmd : cmd.post_url(cmd.create_url(), json={}),
+                     lambda cmd : asyncio.run(push(cmd, cmd.create_url()))) :
+            try :
+                call(DynamicUrl(url=nodes.urls[:2]).chain.push_transaction)
+                assert False, 'a write must not be resent after a 5xx'
+            except (requests.exceptions.HTTPError, EOSAPIException) :
+                pass
+        assert len(nodes[0].calls('/v1/chain/push_transaction')) == 2
+        assert nodes[1].calls('/v1/chain/push_transaction') == []
+        # a read timeout on the slow node is not retried either
+        dyn = DynamicUrl(url=nodes.urls[1:])
+        cmd = dyn.chain.push_transaction
+        try :
+            cmd.post_url(cmd.create_url(), json={}, timeout=0.1)
+            assert False, 'a write must not be resent after a read timeout'
+        except requests.exceptions.ReadTimeout :
+            pass
+        assert nodes[2].calls('/v1/chain/push_transaction') == []
+        # a node that cannot be connected to never saw the write
+        nodes[0].stop()
+        dyn = DynamicUrl(url=[nodes.urls[0], nodes.urls[2]])
+        cmd = dyn.chain.push_transaction
+        assert cmd.post_url(cmd.create_url(), json={}) == PUSHED
+        assert asyncio.run(push(cmd, cmd.create_url())) == PUSHED
+        assert len(nodes[2].calls('/v1/chain/push_transaction')) == 2
+
+def test_hedge_policy() :
+    from eospy.endpoints import HedgePolicy
+    policy = HedgePolicy(percentile=90, budget=0.25, initial_delay=0.5, min_samples=10)
+    assert policy.delay() == 0.5
+    for ms in range(1, 11) :
+        policy.observe(ms / 1000.0)
+    assert policy.delay() == 0.01
+    policy.start()
+    # the budget is a fraction of the requests seen so far
+    assert not policy.allow()
+    for _ in range(7) :
+        policy.start()
+    assert policy.allow() and policy.allow() and not policy.allow()
+
+def test_hedged_reads() :
+    import time
+    from eospy.endpoints import HedgePolicy
+
+    async def run(ce) :
+        async with ce :
+            start = time.monotonic()
+            assert await ce.async_get_info() == INFO
+            assert time.monotonic() - start < 0.4
+            # the slow node now ranks behind the one that won the race
+            assert await ce.async_get_info() == INFO
+
+    with MockNodes(2) as nodes :
+        nodes.route('/v1/chain/get_info', INFO)
+        nodes[0].delay = 0.5
+        ce = Cleos(url=nodes.urls, hedge=HedgePolicy(budget=1.0, initial_delay=0.02))
+        asyncio.run(run(ce))
+        assert ce.hedge_stats()['hedges'] == 1
+        assert len(nodes[1].calls('/v1/chain/get_info')) == 2
+        assert ce._dynurl._hedged('/v1/chain/get_table_rows')
+        assert not ce._dynurl._hedged('/v1/chain/push_transaction')
+
+def test_hedge_budget() :
+    from eospy.endpoints import HedgePolicy
+
+    async def run(ce) :
+        async with ce :
+            for _ in range(4) :
+                assert await ce.async_get_info() == INFO
+
+    with MockNodes(2) as nodes :
+        nodes.route('/v1/chain/get_info', INFO)
+        nodes[0].delay = nodes[1].delay = 0.05
+        ce = Cleos(url=nodes.urls, hedge=HedgePolicy(budget=0.5, initial_delay=0.01))
+        asyncio.run(run(ce))
+        assert ce.hedge_stats()['requests'] == 4
+        assert ce.hedge_stats()['hedges'] == 2
@@ -0,0 +1,128 @@
+from eospy.keys import EOSKey
+from eospy.utils import sha256
+
+WIF = '5KQwrPbwdL6PhXujxW37FSSQZ1JiwsST4cqQzDeyXtP79zkvFD3'
+PUB = 'EOS6MRyAjQq8ud7hVNYcfnVPJqcVpscN5So8BhtHuGYqET5GDW5CV'
+# (digest, signature) pairs produced by the reference signer
+SIGNATURES = [
+    ('42a98f3d3ee09518c8e23699af60fa6d97bb457436a68142b342d2395ecfe405', 'SIG_K1_Kcp8qr2BYQHFnzdXD8MUVkvw7vRxnoj3oE4Nv8dEd9D8zAXA1sMEkwFjik2WvLo3ycCvR292w9FoXYe6J5rNUEQ3qfoXyD'),
+    ('289e5175e02c788c2d442cfe81d6be0533d8c13e253ef763fda45d37accfe4d4', 'SIG_K1_Kf2L8Wk3o2VEoiTt1epGk41cULAPXcBKCEqcCPZNz13kHXBSSixnJioNBA4jBi2QoJCCXeB4NXAquQR6yXB3oaF5bohX6J'),
+    ('a78521e49048b6e0d368d3fba417fc20c7546272dafa78a8a173fcca6c81233b', 'SIG_K1_Khk4tzysTm5wMWjRZ5KEhv82wPmLN6DHr7FQKRTQ3sp4aY7FuLG1LYWEVLGndN1qA2kfTHC2bdoYoZN7bJsBeqA34k8cgz'),
+    ('89da2bd31a5d008c84323c9693f12f09e62a75a688a55f2a6fd24660afba5660', 'SIG_K1_KggM24goTchbi7zKHMBWUQdj9PfvPGPdW9SNWaaNMXS854coAjEKtaXypBzENBLpD2SguZVM4ubpCfHC3AcPCu6xoUHWJy'),
+    ('51b5df22eaeaf7a6101b57cfb45084cb98864b1502c6ed1a692da604366a13a4', 'SIG_K1_KaW1CE2EvDDUiw8ExUh1cb6Zmu3Gja71ViYfEtYnjANYw47qADroJH2SE2dNxEugW7umH1HNWsPtrBxwPJSrfajdhPcMNN'),
+    ('92253243f3471651d425293dfe382cb9017fe15fc46b1deb79e561f5a38f7242', 'SIG_K1_K6LSe69QYtMZZeUP3CKL4CKtXoKrxsw48JL7NWKpAcpnyGEvxG9UXUDseeabjhs5J1WRAYDJJ9xJdMiaawMctK9us5KoZd'),
+]
+
+def test_key_roundtrip() :
+    key = EOSKey(WIF)
+    assert key.to_public() == PUB
+    assert key.to_wif() == WIF
+
+def test_sign_vectors() :
+    key = EOSKey(WIF)
+    for digest, sig in SIGNATURES :
+        assert key.sign(digest) == sig
+        assert key.verify(sig, digest)
+
+def _check_recovery(key) :
+    ''' the recovery id in key's signature leads back to key '''
+    digest = sha256(b'recovery')
+    sig = key.sign(digest)
+    decoded = key._check_decode(sig[7:], 'K1')
+    i = int(decoded[:2], 16) - 27 - 4
+    recovered = key._recover_key(bytes.fromhex(digest), bytes.fromhex(decoded[2:]), i)
+    assert recovered.to_string() == key._vk.to_string()
+
+def test_recovery_param() :
+    _check_recovery(EOSKey(WIF))
+
+def test_precomputed_tables() :
+    from eospy import keys
+    keys.precompute_generator(window=4)
+    try :
+        key = EOSKey(WIF).precompute()
+        for digest, sig in SIGNATURES :
+            assert key.sign(digest) == sig
+            assert key.verify(sig, digest)
+            assert not key.verify(sig, sha256(b'other'))
+        _check_recovery(key)
+    finally :
+        keys.clear_precomputed()
+
+def test_backend_conformance() :
+    from eospy import keys
+    key = EOSKey(WIF)
+    digests = [sha256('conformance {}'.format(i).encode()) for i in range(4)]
+    keys.set_backend('ecdsa')
+    try :
+        expected = [key.sign(digest) for digest in digests]
+        for name in keys.available_backends() :
+            keys.set_backend(name)
+            for digest, sig in SIGNATURES + list(zip(digests, expected)) :
+                assert key.sign(digest) == sig, name
+                assert key.verify(sig, digest), name
+                assert not key.verify(sig, sha256(b'other')), name
+            _check_recovery(key)
+            _check_verify_many()
+    finally :
+        keys.clear_precomputed()
+    try :
+        keys.set_backend('missing')
+        assert False, 'unknown backend accepted'
+    except ValueError :
+        pass
+
+def test_batch_signer() :
+    from eospy.batch import BatchSigner
+    other = EOSKey()
+    jobs = [(sha256('batch {}'.format(i).encode()), WIF if i % 2 else other) for i in range(10)]
+    with BatchSigner([WIF, other], workers=2, chunksize=3) as signer :
+        signatures = signer.sign(jobs)
+        assert signer.sign_digests([digest for digest, _ in SIGNATURES]) == [sig for _, sig in SIGNATURES]
+    key = EOSKey(WIF)
+    assert signatures == [(key if k == WIF else other).sign(digest) for digest, k in jobs]
+
+def _check_verify_many() :
+    ''' public keys recovered from SIGNATURES, checked one by one and across a pool '''
+    from eospy.keys import recover_public_key, verify_many
+    other = EOSKey()
+    for digest, sig in SIGNATURES :
+        assert recover_public_key(sig, digest) == PUB
+    items = [(sig, digest, PUB) for digest, sig in SIGNATURES]
+    items.append((SIGNATURES[0][1], SIGNATURES[1][0], PUB))
+    items.append((SIGNATURES[0][1], SIGNATURES[0][0], other.to_public()))
+    expected = [True] * len(SIGNATURES) + [False, False]
+    assert verify_many(items) == expected
+    assert verify_many(items, workers=2, chunksize=3) == expected
+
+def test_recover_and_verify_many() :
+    _check_verify_many()
+
+def test_check_wif_and_key_cache() :
+    from eospy.keys import check_wif, get_key
+    key = EOSKey(WIF)
+    pvt = 'PVT_K1_' + key._check_encode(key._sk.to_string().hex(), 'K1').decode()
+    assert check_wif(WIF) and check_wif(pvt)
+    assert EOSKey(pvt).to_wif() == WIF
+    for bad in [WIF[:-1] + '4', pvt[:-2] + '11', PUB, 'not a key', '', None, key] :
+        assert not check_wif(bad)
+    assert get_key(WIF) is get_key(WIF)
+    assert get_key(WIF).to_public() == PUB
+
+def test_key_cached_encodings() :
+    key = EOSKey(WIF)
+    assert not hasattr(key, '__dict__')
+    assert key.to_public() is key.to_public() and str(key) == PUB
+    assert key.to_wif() is key.to_wif()
+    assert key._compress_pubkey()[2:] == key._vk.to_string()[:32].hex()
+    assert key._sk.to_string() == bytes.fromhex(key._check_decode(WIF, 'sha256x2')[2:])
+    generated = EOSKey()
+    assert EOSKey(generated.to_wif()).to_public() == generated.to_public()
+
+def test_generate_keys() :
+    from eospy.keys import generate_keys
+    for workers in (None, 2) :
+        pairs = list(generate_keys(7, workers=workers, chunksize=3))
+        assert len(pairs) == 7 and len(set(pairs)) == 7
+        for wif, pub in pairs :
+            assert EOSKey(wif).to_public() == pub
@@ -0,0 +1,115 @@
+import asyncio
+from mock_node import MockNode
+from eospy.cleos import Cleos
+from eospy.exceptions import EOSTablePaginationError
+from eospy.tables import next_lower_bound
+
+ROWS = [{'id': i, 'balance': '{}.0000 EOS'.format(i)} for i in range(250)]
+
+def table_rows(rows) :
+    ''' get_table_rows over rows sorted by id, bounds are inclusive like nodeos '''
+    def handler(payload) :
+        lower = int(payload['lower_bound'] or 0)
+        upper = int(payload['upper_bound']) if payload['upper_bound'] else None
+        selected = [r for r in rows if r['id'] >= lower and (upper is None or r['id'] <= upper)]
+        page = selected[:payload['limit']]
+        more = len(selected) > len(page)
+        return {'rows': page, 'more': more, 'next_key': str(selected[len(page)]['id']) if more else ''}
+    return handler
+
+def test_next_lower_bound() :
+    assert next_lower_bound({'rows': [], 'more': False, 'next_key': ''}) is None
+    assert next_lower_bound({'rows': [], 'more': True, 'next_key': '12'}) == '12'
+    try :
+        next_lower_bound({'rows': [], 'more': True})
+        assert False, 'more without next_key cannot be paged'
+    except EOSTablePaginationError :
+        pass
+
+def test_iter_table() :
+    with MockNode() as node :
+        node.route('/v1/chain/get_table_rows', table_rows(ROWS))
+        with Cleos(url=node.url) as ce :
+            assert list(ce.iter_table('eosio.token', 'eosio', 'accounts', page_size=40)) == ROWS
+            bounded = ce.iter_table('eosio.token', 'eosio', 'accounts', key_type='i64', lower_bound='10',
+                                    upper_bound='109', page_size=25, prefetch=0)
+            assert [r['id'] for r in bounded] == list(range(10, 110))
+            # stopping early leaves the prefetch thread nothing to wait on
+            rows = ce.iter_table('eosio.token', 'eosio', 'accounts', page_size=10, prefetch=2)
+            assert next(rows) == ROWS[0]
+            rows.close()
+        calls = node.calls('/v1/chain/get_table_rows')
+        assert [c['lower_bound'] for c in calls[:7]] == ['', '40', '80', '120', '160', '200', '240']
+        assert all(c['upper_bound'] == '109' and c['key_type'] == 'i64' for c in calls[7:11])
+
+def test_aiter_table() :
+    async def run(ce) :
+        async with ce :
+            rows = [row async for row in ce.aiter_table('eosio.token', 'eosio', 'accounts', page_size=64, prefetch=2)]
+            assert rows == ROWS
+            rows = [row async for row in ce.aiter_table('eosio.token', 'eosio', 'accounts', lower_bound='200', prefetch=0)]
+            assert rows == ROWS[200:]
+
+    with MockNode() as node :
+        node.route('/v1/chain/get_table_rows', table_rows(ROWS))
+        asyncio.run(run(Cleos(url=node.url)))
+        assert len(node.calls('/v1/chain/get_table_rows')) == 5
+
+SCOPES = ['alice', 'bob', 'carol', 'dave', 'erin']
+SCOPED = dict((scope, [{'id': i * 7 + n, 'scope': scope} for i in range(30)]) for n, scope in enumerate(SCOPES))
+
+def mock_scoped_table(node, inflight) :
+    import threading, time
+    lock = threading.Lock()
+
+    def rows(payload) :
+        with lock :
+            inflight.append(inflight[-1] + 1)
+        time.sleep(0.002)
+        try :
+            return table_rows(SCOPED[payload['scope']])(payload)
+        finally :
+            with lock :
+                inflight.append(inflight[-1] - 1)
+
+    def by_scope(payload) :
+        selected = [s for s in SCOPES if s >= (payload['lower_bound'] or '')]
+        page = selected[:payload['limit']]
+        more = selected[len(page)] if len(selected) > len(page) else ''
+        return {'rows': [{'code': 'eosio.token', 'scope': s, 'table': 'accounts', 'count': 30} for s in page], 'more': more}
+
+    node.route('/v1/chain/get_table_rows', rows)
+    node.route('/v1/chain/get_table_by_scope', by_scope)
+
+def test_scan_table() :
+    expected = [(scope, row) for scope in SCOPES for row in SCOPED[scope]]
+
+    async def run(ce) :
+        async with ce :
+            scopes = await ce.async_get_table_by_scope('eosio.token', 'accounts', limit=2)
+            assert [r['scope'] for r in scopes['rows']] == ['alice', 'bob'] and scopes['more'] == 'carol'
+            rows = [r async for r in ce.scan_table('eosio.token', 'accounts', page_size=8, concurrency=3)]
+            assert rows == expected
+            rows = [r async for r in ce.scan_table('eosio.token', 'accounts', scopes=SCOPES[::-1], shards=4,
+                                                   concurrency=4, ordered=False, page_size=8)]
+            assert sorted(rows, key=lambda r : (r[0], r[1]['id'])) == expected
+            # sharded ranges stay in key order
+            rows = [r async for r in ce.scan_table('eosio.token', 'accounts', scopes='carol', shards=3,
+                                                   upper_bound='100', page_size=4)]
+            assert [row['id'] for _, row in rows] == [row['id'] for row in SCOPED['carol'] if row['id'] <= 100]
+
+    inflight = [0]
+    with MockNode() as node :
+        mock_scoped_table(node, inflight)
+        asyncio.run(run(Cleos(url=node.url)))
+        assert len(node.calls('/v1/chain/get_table_by_scope')) == 2
+        assert all(c['key_type'] == 'i64' for c in node.calls('/v1/chain/get_table_rows')[-4:])
+    assert 1 < max(inflight) <= 4
+
+def test_split_key_range() :
+    from eospy.tables import split_key_range, UINT64_MAX
+    assert split_key_range(3, 0, 9) == [('0', '2'), ('3', '5'), ('6', '9')]
+    assert split_key_range(8, '5', '6') == [('5', '5'), ('6', '6')]
+    ranges = split_key_range(4)
+    assert ranges[0][0] == '0' and ranges[-1][1] == str(UINT64_MAX)
+    assert all(int(a[1]) + 1 == int(b[0]) for a, b in zip(ranges, ranges[1:]))